@@ -1,7 +1,9 @@
 """"""
 from copy import copy
 
+from vnpy.event import Event
 from vnpy.trader.engine import MainEngine
+from vnpy.trader.event import EVENT_CONTRACT
 from vnpy.trader.object import (
     ContractData,
     OrderData,
@@ -19,6 +21,22 @@ class OffsetConverter:
         """"""
         self.main_engine = main_engine
         self.holdings = {}
+        self.convert_required_flags = {}
+
+        self.main_engine.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
+
+    def close(self):
+        """
+        Unregister contract event handler, so converter no longer used can be released.
+        """
+        self.main_engine.event_engine.unregister(EVENT_CONTRACT, self.process_contract_event)
+
+    def process_contract_event(self, event: Event):
+        """
+        Contract may be updated after reconnect, so cached flag is removed.
+        """
+        contract = event.data
+        self.convert_required_flags.pop(contract.vt_symbol, None)
 
     def update_position(self, position: PositionData):
         """"""
@@ -28,6 +46,23 @@ class OffsetConverter:
         holding = self.get_position_holding(position.vt_symbol)
         holding.update_position(position)
 
+    def update_positions(self, positions: list):
+        """
+        Update positions in bulk, such as after reconnect.
+        Positions are grouped by symbol, so contract flag and holding are looked up once per symbol.
+        """
+        symbol_positions = {}
+        for position in positions:
+            symbol_positions.setdefault(position.vt_symbol, []).append(position)
+
+        for vt_symbol, position_list in symbol_positions.items():
+            if not self.is_convert_required(vt_symbol):
+                continue
+
+            holding = self.get_position_holding(vt_symbol)
+            for position in position_list:
+                holding.update_position(position)
+
     def update_trade(self, trade: TradeData):
         """"""
         if not self.is_convert_required(trade.vt_symbol):
@@ -79,15 +114,20 @@ class OffsetConverter:
         """
         Check if the contract needs offset convert.
         """
+        flag = self.convert_required_flags.get(vt_symbol, None)
+        if flag is not None:
+            return flag
+
         contract = self.main_engine.get_contract(vt_symbol)
 
-        # Only contracts with long-short position mode requires convert
+        # Contract may not be received yet, so do not cache
         if not contract:
             return False
-        elif contract.net_position:
-            return False
-        else:
-            return True
+
+        # Only contracts with long-short position mode requires convert
+        flag = not contract.net_position
+        self.convert_required_flags[vt_symbol] = flag
+        return flag
 
 
 class PositionHolding:
@@ -100,6 +140,14 @@ class PositionHolding:
 
         self.active_orders = {}
 
+        # Remaining volume of each close order, and running sums by direction and offset
+        self.order_frozens = {}
+        self.order_frozen_sums = {
+            (direction, offset): 0
+            for direction in [Direction.LONG, Direction.SHORT]
+            for offset in [Offset.CLOSE, Offset.CLOSETODAY, Offset.CLOSEYESTERDAY]
+        }
+
         self.long_pos = 0
         self.long_yd = 0
         self.long_td = 0
@@ -131,9 +179,20 @@ class PositionHolding:
         """"""
         if order.is_active():
             self.active_orders[order.vt_orderid] = order
+            frozen = order.volume - order.traded
         else:
             if order.vt_orderid in self.active_orders:
                 self.active_orders.pop(order.vt_orderid)
+            frozen = 0
+
+        # Only close orders freeze position (open and net-mode NONE orders are ignored),
+        # apply difference of remaining volume, terminal order releases all
+        key = (order.direction, order.offset)
+        if key in self.order_frozen_sums:
+            last_frozen = self.order_frozens.pop(order.vt_orderid, 0)
+            if frozen:
+                self.order_frozens[order.vt_orderid] = frozen
+            self.order_frozen_sums[key] += frozen - last_frozen
 
         self.calculate_frozen()
 
@@ -183,49 +242,40 @@ class PositionHolding:
         self.short_pos = self.short_td + self.short_yd
 
     def calculate_frozen(self):
-        """"""
-        self.long_pos_frozen = 0
-        self.long_yd_frozen = 0
-        self.long_td_frozen = 0
-
-        self.short_pos_frozen = 0
-        self.short_yd_frozen = 0
-        self.short_td_frozen = 0
-
-        for order in self.active_orders.values():
-            # Ignore position open orders
-            if order.offset == Offset.OPEN:
-                continue
-
-            frozen = order.volume - order.traded
+        """
+        Calculate frozen volume from running sums of close orders.
 
-            if order.direction == Direction.LONG:
-                if order.offset == Offset.CLOSETODAY:
-                    self.short_td_frozen += frozen
-                elif order.offset == Offset.CLOSEYESTERDAY:
-                    self.short_yd_frozen += frozen
-                elif order.offset == Offset.CLOSE:
-                    self.short_td_frozen += frozen
-
-                    if self.short_td_frozen > self.short_td:
-                        self.short_yd_frozen += (self.short_td_frozen
-                                                 - self.short_td)
-                        self.short_td_frozen = self.short_td
-            elif order.direction == Direction.SHORT:
-                if order.offset == Offset.CLOSETODAY:
-                    self.long_td_frozen += frozen
-                elif order.offset == Offset.CLOSEYESTERDAY:
-                    self.long_yd_frozen += frozen
-                elif order.offset == Offset.CLOSE:
-                    self.long_td_frozen += frozen
-
-                    if self.long_td_frozen > self.long_td:
-                        self.long_yd_frozen += (self.long_td_frozen
-                                                - self.long_td)
-                        self.long_td_frozen = self.long_td
-
-            self.long_pos_frozen = self.long_td_frozen + self.long_yd_frozen
-            self.short_pos_frozen = self.short_td_frozen + self.short_yd_frozen
+        CLOSETODAY and CLOSEYESTERDAY orders freeze their own position as is.
+        CLOSE orders freeze today position not frozen by CLOSETODAY first, the rest freezes yesterday position.
+        The result does not depend on order arrival when one side mixes CLOSE with CLOSETODAY,
+        where the former loop over active orders did.
+        """
+        sums = self.order_frozen_sums
+
+        # Long orders close short position, short orders close long position
+        self.short_td_frozen, self.short_yd_frozen = self.split_frozen(
+            self.short_td,
+            sums[(Direction.LONG, Offset.CLOSETODAY)],
+            sums[(Direction.LONG, Offset.CLOSEYESTERDAY)],
+            sums[(Direction.LONG, Offset.CLOSE)]
+        )
+        self.long_td_frozen, self.long_yd_frozen = self.split_frozen(
+            self.long_td,
+            sums[(Direction.SHORT, Offset.CLOSETODAY)],
+            sums[(Direction.SHORT, Offset.CLOSEYESTERDAY)],
+            sums[(Direction.SHORT, Offset.CLOSE)]
+        )
+
+        self.long_pos_frozen = self.long_td_frozen + self.long_yd_frozen
+        self.short_pos_frozen = self.short_td_frozen + self.short_yd_frozen
+
+    @staticmethod
+    def split_frozen(td: int, td_frozen: int, yd_frozen: int, close_frozen: int):
+        """
+        Close orders freeze today position first, the rest freezes yesterday position.
+        """
+        close_td_frozen = min(close_frozen, max(td - td_frozen, 0))
+        return td_frozen + close_td_frozen, yd_frozen + close_frozen - close_td_frozen
 
     def convert_order_request_shfe(self, req: OrderRequest):
         """"""
@@ -1,17 +1,26 @@
+import os
+import csv
+import json
 import pickle
 import traceback
-import pandas as pd
+import heapq
+import sqlite3
 
-from datetime import datetime, timedelta, time
+from datetime import datetime, time, timedelta
 from enum import Enum
+from threading import Thread, Lock, get_ident
+from queue import Queue, Empty
+from time import monotonic, sleep
 from copy import copy
+from pathlib import Path
+from logging import DEBUG, INFO, WARNING, getLevelName
+from collections import defaultdict, deque
 from dataclasses import dataclass
 from typing import Optional, Tuple, Union
 
 from vnpy.event import EventEngine, Event
 from vnpy.trader.engine import BaseEngine, MainEngine
 from vnpy.trader.utility import load_json, save_json, get_folder_path, get_file_path
-from vnpy.trader.converter import OffsetConverter
 from vnpy.trader.constant import (
     OrderType,
     Direction,
@@ -20,6 +29,7 @@ from vnpy.trader.constant import (
 )
 from vnpy.trader.event import (
     EVENT_TICK,
+    EVENT_CONTRACT,
     EVENT_ORDER,
     EVENT_TRADE,
     EVENT_POSITION,
@@ -36,6 +46,8 @@ from vnpy.trader.object import (
     PositionData
 )
 
+from .converter import OffsetConverter
+
 
 @dataclass
 class PosDeltaData:
@@ -82,11 +94,934 @@ EVENT_FOLLOW_LOG = "eFollowLog"
 EVENT_FOLLOW_POS_DELTA = "eFollowPosDelta"
 EVENT_FOLLOW_ORDER = "eFollowOrder"
 EVENT_FOLLOW_MODIFY_POS = "eFollowModifyPos"
+EVENT_FOLLOW_TIMER = "eFollowTimer"
+EVENT_FOLLOW_START = "eFollowStart"
 
 DAYLIGHT_MARKET_END = time(15, 2)
 NIGHT_MARKET_BEGIN = time(20, 45)
 
 
+class LatencyStats:
+    """
+    Rolling latency samples of follow signals, grouped by vt_symbol, path and segment.
+
+    Stages of a signal: receive -> convert -> enqueue -> dispatch -> sent -> filled.
+    Paths: direct, inline(direct dispatch), queue(due_out_req_dict), chase.
+    """
+    segments = [
+        ("receive", "convert"),
+        ("convert", "enqueue"),
+        ("enqueue", "dispatch"),
+        ("dispatch", "sent"),
+        ("receive", "sent"),
+    ]
+
+    def __init__(self, window: int = 1000, max_signals: int = 10000):
+        """"""
+        self.window = window
+        self.max_signals = max_signals
+
+        self.signal_stamps = {}         # signal_id: {stage: monotonic}
+        self.signal_info = {}           # signal_id: (vt_symbol, path)
+        self.order_sent = {}            # vt_orderid: (signal_id, vt_symbol, path, monotonic)
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))   # (vt_symbol, path, segment): deque
+
+    def stamp(self, signal_id: str, stage: str, vt_symbol: str = "", path: str = "", ts: float = 0):
+        """"""
+        stamps = self.signal_stamps.get(signal_id, None)
+        if stamps is None:
+            # 未成交的信号不会被清理，超过上限时丢弃最早的记录
+            if len(self.signal_stamps) >= self.max_signals:
+                oldest = next(iter(self.signal_stamps))
+                self.signal_stamps.pop(oldest)
+                self.signal_info.pop(oldest, None)
+            stamps = self.signal_stamps[signal_id] = {}
+
+        stamps[stage] = ts or monotonic()
+
+        if vt_symbol or path:
+            old_symbol, old_path = self.signal_info.get(signal_id, ("", "direct"))
+            self.signal_info[signal_id] = (vt_symbol or old_symbol, path or old_path)
+
+    def record(self, vt_symbol: str, path: str, segment: str, seconds: float):
+        """"""
+        self.samples[(vt_symbol, path, segment)].append(seconds)
+
+    def on_sent(self, signal_id: str, vt_orderids: list):
+        """
+        Record segments before order sent and start waiting first fill.
+        """
+        stamps = self.signal_stamps.get(signal_id, None)
+        if stamps is None:
+            return
+
+        now = monotonic()
+        stamps["sent"] = now
+        vt_symbol, path = self.signal_info.get(signal_id, ("", "direct"))
+
+        for begin, end in self.segments:
+            if begin in stamps and end in stamps:
+                self.record(vt_symbol, path, f"{begin}_to_{end}", stamps[end] - stamps[begin])
+
+        for vt_orderid in vt_orderids:
+            self.add_order_sent(vt_orderid, (signal_id, vt_symbol, path, now))
+
+    def on_chase_sent(self, vt_orderid: str, vt_symbol: str, dispatch_time: float):
+        """"""
+        now = monotonic()
+        self.record(vt_symbol, "chase", "dispatch_to_sent", now - dispatch_time)
+        self.add_order_sent(vt_orderid, ("", vt_symbol, "chase", now))
+
+    def add_order_sent(self, vt_orderid: str, sent_info: tuple):
+        """"""
+        # 结束状态回报丢失的委托不会被清理，超过上限时丢弃最早的记录
+        if len(self.order_sent) >= self.max_signals:
+            self.order_sent.pop(next(iter(self.order_sent)))
+        self.order_sent[vt_orderid] = sent_info
+
+    def on_order_finished(self, vt_orderid: str):
+        """
+        Stop waiting fill of order cancelled or rejected without trade.
+        """
+        self.order_sent.pop(vt_orderid, None)
+
+    def on_fill(self, vt_orderid: str):
+        """
+        Record first fill of target order.
+        """
+        sent_info = self.order_sent.pop(vt_orderid, None)
+        if sent_info is None:
+            return
+
+        signal_id, vt_symbol, path, sent_time = sent_info
+        now = monotonic()
+        self.record(vt_symbol, path, "sent_to_fill", now - sent_time)
+
+        stamps = self.signal_stamps.pop(signal_id, None)
+        self.signal_info.pop(signal_id, None)
+        if stamps and "receive" in stamps:
+            self.record(vt_symbol, path, "receive_to_fill", now - stamps["receive"])
+
+    def clear(self):
+        """"""
+        self.signal_stamps.clear()
+        self.signal_info.clear()
+        self.order_sent.clear()
+
+    @staticmethod
+    def get_percentile(sorted_values: list, q: float):
+        """"""
+        index = int(round(q * (len(sorted_values) - 1)))
+        return sorted_values[index]
+
+    def get_summary(self, by_symbol: bool = True):
+        """
+        Get count/p50/p99/max in milliseconds of each (vt_symbol, path, segment).
+        """
+        groups = defaultdict(list)
+        for (vt_symbol, path, segment), values in self.samples.items():
+            key = (vt_symbol, path, segment) if by_symbol else (path, segment)
+            groups[key].extend(values)
+
+        summary = {}
+        for key, values in groups.items():
+            if not values:
+                continue
+            values = sorted(values)
+            summary[key] = {
+                "count": len(values),
+                "p50": self.get_percentile(values, 0.5) * 1000,
+                "p99": self.get_percentile(values, 0.99) * 1000,
+                "max": values[-1] * 1000
+            }
+        return summary
+
+
+class SymbolPrice:
+    """
+    Pricing record of symbol, updated in place by tick.
+    Best bid/ask are already adjusted by limit price, so pricing only reads attributes.
+    """
+    __slots__ = ("pricetick", "limit_up", "limit_down", "ask_price", "bid_price")
+
+    def __init__(self, pricetick: float, limit_up: float, limit_down: float):
+        """"""
+        self.pricetick = pricetick
+        self.limit_up = limit_up
+        self.limit_down = limit_down
+        self.ask_price = limit_up
+        self.bid_price = limit_down
+
+    def update_tick(self, tick: TickData):
+        """"""
+        # 涨跌停的时候不能直接用盘口价格，需要做处理，有些版本涨跌停数据是显示天文数字
+        ask_price = tick.ask_price_1
+        if ask_price == 0:
+            self.ask_price = self.limit_up
+        else:
+            # 处理旧版本的涨停
+            self.ask_price = min(ask_price, self.limit_up)
+
+        bid_price = tick.bid_price_1
+        if bid_price == 0 or bid_price > self.limit_up:
+            self.bid_price = self.limit_down
+        else:
+            self.bid_price = bid_price
+
+
+class TradeArchive:
+    """
+    Append-only daily trade file under trade folder, each trade is written once when it arrives.
+    """
+    fields = [
+        "gateway_name", "symbol", "exchange", "orderid", "tradeid",
+        "direction", "offset", "price", "volume", "vt_orderid", "vt_tradeid",
+        "dt", "date", "account_type", "account_id"
+    ]
+
+    def __init__(self, folder_name: str = "trade"):
+        """"""
+        self.folder_name = folder_name
+        self.date = ""
+        self.file = None
+        self.writer = None
+        self.vt_tradeids = set()
+        self.lock = Lock()
+
+    def get_file_path(self, date: str):
+        """"""
+        return get_folder_path(self.folder_name).joinpath(f"trade_{date}.csv")
+
+    def open(self, date: str):
+        """
+        Open trade file of date, trades already in file are loaded to avoid writing twice.
+        """
+        self.close()
+        self.date = date
+        self.vt_tradeids.clear()
+
+        file_path = self.get_file_path(date)
+        is_new = True
+        if file_path.exists() and file_path.stat().st_size:
+            with open(file_path, newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                if reader.fieldnames == self.fields:
+                    self.vt_tradeids.update(row["vt_tradeid"] for row in reader)
+                    is_new = False
+
+            # 旧版本整表保存的文件字段不同，改名保留，已有同名文件时加序号，不覆盖
+            if is_new:
+                old_path = file_path.with_name(f"trade_{date}_old.csv")
+                n = 0
+                while old_path.exists():
+                    n += 1
+                    old_path = file_path.with_name(f"trade_{date}_old_{n}.csv")
+                file_path.rename(old_path)
+
+        self.file = open(file_path, "a", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, self.fields)
+        if is_new:
+            self.writer.writeheader()
+
+    def add_record(self, d: dict):
+        """"""
+        with self.lock:
+            if d["date"] != self.date:
+                self.open(d["date"])
+
+            if d["vt_tradeid"] in self.vt_tradeids:
+                return False
+
+            self.writer.writerow(d)
+            self.vt_tradeids.add(d["vt_tradeid"])
+            return True
+
+    def is_recorded(self, vt_tradeid: str):
+        """"""
+        return vt_tradeid in self.vt_tradeids
+
+    def flush(self):
+        """"""
+        with self.lock:
+            if self.file:
+                self.file.flush()
+
+    def close(self):
+        """"""
+        if self.file:
+            self.file.close()
+            self.file = None
+            self.writer = None
+
+    def load_records(self, start_date: str, end_date: str):
+        """
+        Load trade records between dates(YYYYMMDD, both included) for analysis over several days.
+
+        Files are plain csv, not a columnar store: every row of each day in range is parsed,
+        there is no column projection or filter pushdown, so cost grows with total rows loaded.
+        Renamed files of old version (trade_YYYYMMDD_old*.csv) are not included.
+        """
+        self.flush()
+
+        records = []
+        folder_path = get_folder_path(self.folder_name)
+        for file_path in sorted(folder_path.glob("trade_*.csv")):
+            date = file_path.stem[len("trade_"):]
+            if not (date.isdigit() and start_date <= date <= end_date):
+                continue
+
+            with open(file_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    row["price"] = float(row["price"])
+                    row["volume"] = float(row["volume"])
+                    records.append(row)
+        return records
+
+
+class DedupStore:
+    """
+    Set of ids received in current trading day, bounded in memory and persisted in sqlite.
+
+    Recent ids are kept in memory. Ids evicted from memory or received before restart are looked up in database,
+    only if their timestamp is not later than watermark, the latest timestamp of ids out of memory.
+    Ids of former trading days are deleted when trading day changes.
+    Without filepath it works as a plain set in memory.
+    """
+
+    def __init__(self, table: str, filepath: str = "", capacity: int = 20000):
+        """"""
+        self.table = table
+        self.filepath = filepath
+        self.capacity = capacity
+
+        self.trading_day = ""
+        self.connection = None
+        self.is_loaded = False
+        self.is_db_lookup = False       # 数据库中有内存之外的id时才需要查询
+        self.watermark = 0              # 内存之外的id的最大时间戳，更晚的id只查内存
+
+        self.recent_ids = set()
+        self.recent_queue = deque()     # (id, ts)
+        self.pending_ids = []           # (id, ts)
+
+    @staticmethod
+    def get_trading_day(now: datetime):
+        """
+        Night session belongs to next trading day, weekend is skipped.
+        """
+        day = now.date()
+        if now.time() >= DAYLIGHT_MARKET_END:
+            day += timedelta(days=1)
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        return day.strftime("%Y%m%d")
+
+    @staticmethod
+    def get_ts(data: Union[OrderData, TradeData]):
+        """
+        Timestamp of order or trade from gateway, same in repeated pushes. 0 if unknown.
+        """
+        dt = getattr(data, "datetime", None)
+        return dt.timestamp() if dt else 0
+
+    def load(self):
+        """
+        Open database and load latest ids of current trading day into memory.
+        """
+        self.is_loaded = True
+        if not self.filepath:
+            return
+
+        if not self.connection:
+            self.connection = sqlite3.connect(self.filepath, check_same_thread=False)
+
+            # 旧版本的表没有时间戳字段，数据只保存当日，直接重建
+            columns = [row[1] for row in self.connection.execute(f"PRAGMA table_info({self.table})")]
+            if columns and "ts" not in columns:
+                self.connection.execute(f"DROP TABLE {self.table}")
+
+            self.connection.executescript(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    trading_day TEXT, id TEXT, ts REAL, PRIMARY KEY (trading_day, id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS {self.table}_ts ON {self.table} (trading_day, ts);
+                """
+            )
+
+        # 过期的id直接删除
+        self.connection.execute(f"DELETE FROM {self.table} WHERE trading_day != ?", (self.trading_day,))
+        self.connection.commit()
+
+        # 按时间戳倒序只读取内存容量内的id，不遍历全部记录
+        self.recent_ids.clear()
+        self.recent_queue.clear()
+        self.is_db_lookup = False
+        self.watermark = 0
+
+        cursor = self.connection.execute(
+            f"SELECT id, ts FROM {self.table} WHERE trading_day = ? ORDER BY ts DESC LIMIT ?",
+            (self.trading_day, self.capacity + 1)
+        )
+        rows = cursor.fetchall()
+        if len(rows) > self.capacity:
+            self.is_db_lookup = True
+            self.watermark = rows[self.capacity][1]
+
+        for id_, ts in reversed(rows[:self.capacity]):
+            self.recent_ids.add(id_)
+            self.recent_queue.append((id_, ts))
+
+    def set_trading_day(self, trading_day: str):
+        """
+        Switch to new trading day and reload lazily.
+        """
+        if trading_day == self.trading_day:
+            return
+
+        self.flush()
+        self.trading_day = trading_day
+        self.recent_ids.clear()
+        self.recent_queue.clear()
+        self.is_db_lookup = False
+        self.watermark = 0
+        self.is_loaded = False
+
+    def contains(self, id_: str, ts: float = 0):
+        """
+        Check id with its timestamp, database is queried only for id not later than watermark.
+        """
+        if not self.is_loaded:
+            self.load()
+
+        if id_ in self.recent_ids:
+            return True
+
+        if not self.is_db_lookup or ts > self.watermark:
+            return False
+
+        cursor = self.connection.execute(
+            f"SELECT 1 FROM {self.table} WHERE trading_day = ? AND id = ?", (self.trading_day, id_)
+        )
+        return cursor.fetchone() is not None
+
+    def __contains__(self, id_: str):
+        """"""
+        return self.contains(id_)
+
+    def add(self, id_: str, ts: float = 0):
+        """"""
+        if not self.is_loaded:
+            self.load()
+
+        if id_ in self.recent_ids:
+            return
+        self.recent_ids.add(id_)
+        self.recent_queue.append((id_, ts))
+
+        if not self.filepath:
+            return
+        self.pending_ids.append((id_, ts))
+
+        # 先落盘再从内存淘汰，保证淘汰的id能在数据库中查到
+        if len(self.recent_queue) > self.capacity:
+            self.flush()
+            while len(self.recent_queue) > self.capacity:
+                old_id, old_ts = self.recent_queue.popleft()
+                self.recent_ids.discard(old_id)
+                self.watermark = max(self.watermark, old_ts)
+            self.is_db_lookup = True
+
+    def flush(self):
+        """"""
+        if not self.pending_ids or not self.connection:
+            return
+
+        self.connection.executemany(
+            f"INSERT OR IGNORE INTO {self.table} VALUES (?, ?, ?)",
+            [(self.trading_day, id_, ts) for id_, ts in self.pending_ids]
+        )
+        self.connection.commit()
+        self.pending_ids.clear()
+
+    def close(self):
+        """"""
+        self.flush()
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+        self.is_loaded = False
+
+    def __len__(self):
+        """"""
+        return len(self.recent_ids)
+
+    def __repr__(self):
+        """"""
+        return f"DedupStore({self.table}, trading_day={self.trading_day}, recent={len(self.recent_ids)})"
+
+
+class FollowHistoryStore:
+    """
+    Daily follow data kept in sqlite, indexed by date, vt_symbol, signal id and target orderid.
+    """
+
+    def __init__(self, filepath: str):
+        """"""
+        self.filepath = filepath
+        self.connection = None
+
+    def connect(self):
+        """"""
+        if self.connection:
+            return
+
+        self.connection = sqlite3.connect(self.filepath, check_same_thread=False)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS follow_order (
+                date TEXT, signal_id TEXT, vt_orderid TEXT, vt_symbol TEXT
+            );
+            CREATE INDEX IF NOT EXISTS follow_order_date ON follow_order (date);
+            CREATE INDEX IF NOT EXISTS follow_order_symbol ON follow_order (vt_symbol, date);
+            CREATE INDEX IF NOT EXISTS follow_order_signal ON follow_order (signal_id);
+            CREATE INDEX IF NOT EXISTS follow_order_orderid ON follow_order (vt_orderid);
+
+            CREATE TABLE IF NOT EXISTS follow_position (
+                date TEXT, vt_symbol TEXT, data TEXT, PRIMARY KEY (date, vt_symbol)
+            );
+            """
+        )
+        self.connection.commit()
+
+    def close(self):
+        """"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def has_date(self, date: str):
+        """"""
+        self.connect()
+        cursor = self.connection.execute("SELECT 1 FROM follow_position WHERE date = ? LIMIT 1", (date,))
+        if cursor.fetchone():
+            return True
+        cursor = self.connection.execute("SELECT 1 FROM follow_order WHERE date = ? LIMIT 1", (date,))
+        return cursor.fetchone() is not None
+
+    def save_follow_data(self, date: str, follow_data: dict, symbol_map: dict = None):
+        """
+        Save follow data of one day. symbol_map is vt_orderid/vt_tradeid: vt_symbol if known,
+        symbol of source trade is used for target order not found in it.
+        Return count of order rows saved without vt_symbol.
+        """
+        self.connect()
+        symbol_map = symbol_map or {}
+
+        order_rows = []
+        missing = 0
+        for signal_id, vt_orderids in follow_data.get("tradeid_orderids_dict", {}).items():
+            for vt_orderid in vt_orderids:
+                vt_symbol = symbol_map.get(vt_orderid, "") or symbol_map.get(signal_id, "")
+                if not vt_symbol:
+                    missing += 1
+                order_rows.append((date, signal_id, vt_orderid, vt_symbol))
+
+        position_rows = [
+            (date, vt_symbol, json.dumps(pos, ensure_ascii=False))
+            for vt_symbol, pos in follow_data.get("positions", {}).items()
+        ]
+
+        with self.connection:
+            self.connection.executemany("INSERT INTO follow_order VALUES (?, ?, ?, ?)", order_rows)
+            self.connection.executemany("INSERT OR REPLACE INTO follow_position VALUES (?, ?, ?)", position_rows)
+        return missing
+
+    @staticmethod
+    def load_trade_symbol_map(trade_folder: Path, date: str):
+        """
+        Get vt_orderid/vt_tradeid: vt_symbol from trade files of date, old version files included.
+        """
+        symbol_map = {}
+        if not trade_folder:
+            return symbol_map
+
+        for file_path in sorted(trade_folder.glob(f"trade_{date}*.csv")):
+            with open(file_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    if not row.get("symbol") or not row.get("exchange"):
+                        continue
+                    vt_symbol = f"{row['symbol']}.{row['exchange']}"
+                    for name in ["vt_orderid", "vt_tradeid"]:
+                        if row.get(name):
+                            symbol_map[row[name]] = vt_symbol
+        return symbol_map
+
+    def import_json_folder(self, folder_path: Path, data_filename: str, trade_folder: Path = None):
+        """
+        Import daily json files saved by old version, dates already in store are skipped.
+        vt_symbol of follow orders is found in trade files of the same date.
+        Return count of files imported and count of order rows whose vt_symbol is not found.
+        """
+        count = 0
+        missing = 0
+        for file_path in sorted(folder_path.glob(f"*_{data_filename}")):
+            date = file_path.name.split("_")[0]
+            if not date.isdigit() or self.has_date(date):
+                continue
+
+            with open(file_path, encoding="utf-8") as f:
+                follow_data = json.load(f)
+            symbol_map = self.load_trade_symbol_map(trade_folder, date)
+            missing += self.save_follow_data(date, follow_data, symbol_map)
+            count += 1
+        return count, missing
+
+    def query_target_orderids(self, signal_id: str):
+        """"""
+        self.connect()
+        cursor = self.connection.execute(
+            "SELECT vt_orderid FROM follow_order WHERE signal_id = ?", (signal_id,)
+        )
+        return [row[0] for row in cursor]
+
+    def query_signal_id(self, vt_orderid: str):
+        """"""
+        self.connect()
+        cursor = self.connection.execute(
+            "SELECT signal_id FROM follow_order WHERE vt_orderid = ? LIMIT 1", (vt_orderid,)
+        )
+        row = cursor.fetchone()
+        return row[0] if row else ""
+
+    def query_follow_orders(self, start_date: str, end_date: str, vt_symbol: str = ""):
+        """
+        Return list of (date, signal_id, vt_orderid, vt_symbol) between dates(both included).
+        """
+        self.connect()
+        sql = "SELECT date, signal_id, vt_orderid, vt_symbol FROM follow_order WHERE date BETWEEN ? AND ?"
+        args = [start_date, end_date]
+        if vt_symbol:
+            sql += " AND vt_symbol = ?"
+            args.append(vt_symbol)
+        return self.connection.execute(sql + " ORDER BY date", args).fetchall()
+
+    def query_positions(self, start_date: str, end_date: str, vt_symbol: str = ""):
+        """
+        Return list of (date, vt_symbol, pos_dict) between dates(both included).
+        """
+        self.connect()
+        sql = "SELECT date, vt_symbol, data FROM follow_position WHERE date BETWEEN ? AND ?"
+        args = [start_date, end_date]
+        if vt_symbol:
+            sql += " AND vt_symbol = ?"
+            args.append(vt_symbol)
+        rows = self.connection.execute(sql + " ORDER BY date", args).fetchall()
+        return [(date, vt_symbol_, json.loads(data)) for date, vt_symbol_, data in rows]
+
+
+class FollowLogger:
+    """
+    Leveled log with per-key sampling and rate limiting.
+    Records are written to file by a background thread.
+    """
+
+    def __init__(self, engine_name: str):
+        """"""
+        self.engine_name = engine_name
+
+        self.level = INFO                   # 低于此级别的日志直接丢弃
+        self.event_level = INFO             # 不低于此级别的日志推送到界面
+        self.rate_limit = 0                 # 每个key每秒最多记录条数，0为不限制
+        self.sample_dict = {}               # key: n，每n条记录1条
+        self.is_to_file = True
+
+        self.key_counters = {}              # key: [second, count, suppressed, total]
+
+        # 跟单户发单线程也会写日志，计数器和写线程启动需要加锁
+        self.lock = Lock()
+
+        self.queue = Queue()
+        self.active = False
+        self.thread = None
+        self.file = None
+        self.file_date = ""
+
+    def is_allowed(self, key: str):
+        """
+        Check sampling and rate limit of message key. Return allowed flag and suppressed count to report.
+        """
+        with self.lock:
+            now_second = int(monotonic())
+            counter = self.key_counters.get(key, None)
+            if counter is None:
+                counter = self.key_counters[key] = [now_second, 0, 0, 0]
+
+            counter[3] += 1
+            sample_n = self.sample_dict.get(key, 1)
+            if sample_n > 1 and (counter[3] - 1) % sample_n:
+                return False, 0
+
+            suppressed = 0
+            if counter[0] != now_second:
+                suppressed = counter[2]
+                counter[0], counter[1], counter[2] = now_second, 0, 0
+
+            if self.rate_limit and counter[1] >= self.rate_limit:
+                counter[2] += 1
+                return False, 0
+
+            counter[1] += 1
+            return True, suppressed
+
+    def write(self, level: int, msg: str):
+        """
+        Put log record into queue of writer thread.
+        """
+        if not self.is_to_file:
+            return
+
+        if not self.active:
+            with self.lock:
+                if not self.active:
+                    self.start()
+        self.queue.put((datetime.now(), level, msg))
+
+    def start(self):
+        """"""
+        self.active = True
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """"""
+        if not self.active:
+            return
+
+        self.active = False
+        self.thread.join()
+
+    def run(self):
+        """"""
+        while self.active or not self.queue.empty():
+            try:
+                dt, level, msg = self.queue.get(timeout=1)
+            except Empty:
+                if self.file:
+                    self.file.flush()
+                continue
+
+            self.write_file(dt, level, msg)
+
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def write_file(self, dt: datetime, level: int, msg: str):
+        """"""
+        date = dt.strftime("%Y%m%d")
+        if date != self.file_date:
+            if self.file:
+                self.file.close()
+
+            log_folder = get_folder_path("follow_log")
+            self.file = open(log_folder.joinpath(f"{self.engine_name}_{date}.log"), "a", encoding="utf-8")
+            self.file_date = date
+
+        self.file.write(f"{dt.strftime('%H:%M:%S.%f')}  {getLevelName(level)}: {msg}\n")
+
+
+class FollowTarget:
+    """
+    Extra target gateway following the same source gateway.
+    Orders are sent by its own worker thread, so a slow gateway can't hold up the others.
+    """
+
+    def __init__(
+        self,
+        follow_engine: "FollowEngine",
+        gateway_name: str,
+        multiples: int = 1,
+        skip_contracts: list = None
+    ):
+        """"""
+        self.follow_engine = follow_engine
+        self.main_engine = follow_engine.main_engine
+
+        self.gateway_name = gateway_name
+        self.multiples = multiples
+        self.skip_contracts = skip_contracts or []
+
+        self.positions = {}                     # vt_symbol: {"long": int, "short": int}
+        self.orderid_to_signal = {}             # vt_orderid: vt_tradeid
+        self.due_out_req_dict = {}              # vt_symbol: list[(vt_tradeid, req, is_must_done)]
+
+        # 开平转换在事件线程更新，在发单线程读取，需要加锁
+        self.offset_converter = OffsetConverter(self.main_engine)
+        self.lock = Lock()
+
+        self.queue = Queue()
+        self.active = False
+        self.thread = None
+
+    def start(self):
+        """"""
+        if self.active:
+            return
+
+        self.active = True
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop worker after requests already in queue are sent, requests waiting for price are discarded.
+        """
+        if not self.active:
+            return
+
+        self.active = False
+        self.thread.join()
+
+        count = sum(len(req_list) for req_list in self.due_out_req_dict.values())
+        if count:
+            self.due_out_req_dict.clear()
+            self.follow_engine.write_log(f"{self.gateway_name}停止，丢弃等待行情的委托请求{count}笔。", WARNING)
+
+    def close(self):
+        """"""
+        self.stop()
+        self.offset_converter.close()
+
+    def update_setting(self, multiples: int, skip_contracts: list):
+        """"""
+        self.multiples = multiples
+        self.skip_contracts = skip_contracts or []
+
+    def run(self):
+        """"""
+        while self.active or not self.queue.empty():
+            try:
+                req, vt_tradeid = self.queue.get(timeout=1)
+            except Empty:
+                continue
+
+            try:
+                self.send_and_record(req, vt_tradeid)
+            except:  # noqa
+                msg = f"{self.gateway_name}发单线程，触发异常：\n{traceback.format_exc()}"
+                self.follow_engine.write_log(msg)
+
+    def put_order(self, req: OrderRequest, vt_tradeid: str):
+        """"""
+        self.queue.put((req, vt_tradeid))
+
+    def send_and_record(self, req: OrderRequest, vt_tradeid: str):
+        """"""
+        lock = self.follow_engine.is_intra_day_symbol(req.symbol)
+        with self.lock:
+            req_list = self.offset_converter.convert_order_request(req, lock=lock)
+
+        if not req_list:
+            self.follow_engine.write_log(f"{self.gateway_name} {vt_tradeid}委托单转换失败，可能是实际可用仓位不足。")
+            return
+
+        vt_orderids = []
+        for req in req_list:
+            for splited_req in self.follow_engine.split_req(req):
+                vt_orderid = self.main_engine.send_order(splited_req, self.gateway_name)
+                if not vt_orderid:
+                    continue
+                vt_orderids.append(vt_orderid)
+                self.orderid_to_signal[vt_orderid] = vt_tradeid
+
+                with self.lock:
+                    self.offset_converter.update_order_request(splited_req, vt_orderid)
+
+        if vt_orderids:
+            self.follow_engine.write_log(f"{self.gateway_name}跟随单 {vt_tradeid}发单成功，委托号：{'  '.join(vt_orderids)}。")
+
+    def convert_req(self, base_req: OrderRequest, vt_tradeid: str):
+        """
+        Convert base order request from source trade to request of this target.
+        """
+        vt_symbol = base_req.vt_symbol
+        if vt_symbol in self.skip_contracts:
+            self.follow_engine.write_log(f"{self.gateway_name} {vt_tradeid} 合约{vt_symbol}禁止同步。")
+            return
+
+        req = copy(base_req)
+        req.volume = base_req.volume * self.multiples
+
+        # 日内合约使用锁仓模式，由开平转换处理
+        if self.follow_engine.is_intra_day_symbol(req.symbol) or req.offset == Offset.OPEN:
+            return req
+
+        req.offset = Offset.CLOSE
+        symbol_pos = self.get_symbol_pos(vt_symbol)
+        available = symbol_pos["short"] if req.direction == Direction.LONG else symbol_pos["long"]
+        if available <= 0:
+            self.follow_engine.write_log(f"{self.gateway_name} {vt_symbol} 跟随策略该品种仓位不足。")
+            return
+        req.volume = min(req.volume, available)
+        return req
+
+    def get_symbol_pos(self, vt_symbol: str):
+        """"""
+        if self.positions.get(vt_symbol, None) is None:
+            self.positions[vt_symbol] = {"long": 0, "short": 0}
+        return self.positions[vt_symbol]
+
+    def update_order(self, order: OrderData):
+        """"""
+        with self.lock:
+            self.offset_converter.update_order(order)
+
+    def update_trade(self, trade: TradeData):
+        """"""
+        with self.lock:
+            self.offset_converter.update_trade(trade)
+
+        symbol_pos = self.get_symbol_pos(trade.vt_symbol)
+        trade_type = FollowEngine.get_trade_type(trade)
+        if trade_type == TradeType.BUY:
+            symbol_pos["long"] += trade.volume
+        elif trade_type == TradeType.SHORT:
+            symbol_pos["short"] += trade.volume
+        elif trade_type == TradeType.SELL:
+            symbol_pos["long"] -= trade.volume
+        else:
+            symbol_pos["short"] -= trade.volume
+
+    def update_position(self, position: PositionData):
+        """"""
+        with self.lock:
+            self.offset_converter.update_position(position)
+
+        self.update_symbol_pos(position)
+
+    def update_positions(self, positions: list):
+        """
+        Update all positions of this gateway in one pass.
+        """
+        with self.lock:
+            self.offset_converter.update_positions(positions)
+
+        for position in positions:
+            self.update_symbol_pos(position)
+
+    def update_symbol_pos(self, position: PositionData):
+        """"""
+        if position.direction == Direction.NET:
+            return
+
+        symbol_pos = self.get_symbol_pos(position.vt_symbol)
+        if position.direction == Direction.LONG:
+            symbol_pos["long"] = position.volume
+        else:
+            symbol_pos["short"] = position.volume
+
+
 class FollowEngine(BaseEngine):
     """
     If following symbol is not intraday mode, The trade can follow many account send to 1 account.
@@ -94,16 +1029,23 @@ class FollowEngine(BaseEngine):
     """
     setting_filename = "follow_trading_setting.json"
     data_filename = "follow_trading_data.json"
+    journal_filename = "follow_trading_data.journal"
+    dedup_filename = "follow_trading_dedup.db"
+    history_filename = "follow_trading_history.db"
+    warm_start_filename = "follow_trading_warm.data"
 
     def __init__(self, main_engine: MainEngine, event_engine: EventEngine):
         super().__init__(main_engine, event_engine, APP_NAME)
 
+        self.logger = FollowLogger(APP_NAME)
+
         #### 参数 ###
         self.source_gateway_name = "CTP"
         self.target_gateway_name = "RPC"
         self.filter_trade_timeout = 60
-        self.cancel_order_timeout = 10
+        self.cancel_order_timeout = 10          # 秒，支持小数
         self.max_cancel = 3
+        self.order_timer_interval = 0.1         # 撤单计时精度，秒
         self.multiples = 1
         self.follow_based = FollowBaseMode.BASE_TRADE
 
@@ -116,7 +1058,7 @@ class FollowEngine(BaseEngine):
         self.chase_base_last_order_price = True
         self.chase_base_price = OrderBasePrice.GOOD_FOR_SELF
         self.chase_order_tick_add = 5
-        self.chase_order_timeout = 10
+        self.chase_order_timeout = 10           # 秒，支持小数
         self.chase_max_resend = 3
         self.is_keep_order_after_chase = False
 
@@ -137,6 +1079,46 @@ class FollowEngine(BaseEngine):
         self.is_filter_order_vol = True
         self.order_volumes_to_follow = [1, 2]
 
+        # 数据存储模式：日志模式下只追加变更记录，定期合并为快照
+        self.is_journal_mode = False
+        self.journal_fsync_batch = 20
+        self.journal_compact_interval = 600
+
+        # 延迟统计汇总日志间隔（秒），0为不输出
+        self.latency_log_interval = 300
+
+        # 在事件引擎线程内直接发单，不经过EVENT_FOLLOW_ORDER事件排队
+        self.is_direct_dispatch = False
+
+        # 仓差推送间隔（毫秒），0为立即推送，间隔内同合约只推送一次
+        self.pos_delta_interval = 500
+
+        # 源户成交合并窗口（毫秒），0为不合并，窗口内同合约的成交合并后一次跟随
+        self.netting_window = 0
+
+        # 日志参数，级别为logging模块的数值
+        self.log_level = INFO
+        self.log_event_level = WARNING
+        self.log_rate_limit = 0
+        self.log_sample_dict = {}
+        self.is_log_to_file = True
+
+        # 自动同步仓位间隔（秒），0为不自动同步。仓差持续reconcile_min_age秒且合约无活动委托才同步
+        self.reconcile_interval = 0
+        self.reconcile_min_age = 10
+        self.reconcile_max_orders = 5
+
+        # 热启动快照：定期保存追单状态、行情价格和已订阅合约，同一交易日重启时恢复
+        self.is_warm_start = True
+        self.warm_start_interval = 10
+
+        # 成交和委托去重记录按交易日保存到数据库，内存中只保留最近的记录
+        self.is_dedup_persist = True
+        self.dedup_memory_size = 20000
+
+        # 其它跟单户，每项为{"gateway_name": str, "multiples": int, "skip_contracts": list}
+        self.extra_target_settings = []
+
         # 运行模式
         self.run_type = FollowRunType.LIVE
         # 测试模式参数
@@ -154,19 +1136,24 @@ class FollowEngine(BaseEngine):
         # 主要容器变量
         self.tradeid_orderids_dict = {}         # vt_tradeid: list[vt_orderid]
         self.positions = {}
-        self.vt_tradeids = set()
-        self.due_out_req_list = []
-        self.orderid_to_signal_orderid = {}     # vt_orderid: vt_orderid or vt_tradeid
+        self.vt_tradeids = DedupStore("trade")
+        self.due_out_req_dict = {}              # vt_symbol: list[(vt_tradeid, req, is_must_done)]
+        self.orderid_to_signal_orderid = {}     # vt_orderid: vt_orderid or vt_tradeid, reverse index of tradeid_orderids_dict
 
         # 委托模式变量
-        self.vt_accepted_orderids = set()
+        self.vt_accepted_orderids = DedupStore("order")
         self.orderid_keep_hang = set()
         self.fail_chase_orderid = set()
 
         # 市场数据初始化变量
         self.pre_subscribe_symbols = set()
-        self.limited_prices = {}
-        self.latest_prices = {}
+        self.symbol_prices = {}                 # vt_symbol: SymbolPrice
+        self.warm_symbol_prices = {}            # vt_symbol: SymbolPrice, 快照恢复，收到首个行情后启用
+
+        # 成交记录和历史跟单数据
+        self.trade_archive = TradeArchive()
+        self.history_store = None
+        self.account_ids = {}                   # gateway_name: accountid
 
         # 净量交易相关变量
         self.intraday_orderids = set()
@@ -179,9 +1166,11 @@ class FollowEngine(BaseEngine):
         self.chase_resend_count_dict = {}       # vt_orderid: int
 
         # 超时撤单变量
-        self.active_order_set = set()
-        self.active_order_counter = {}          # vt_orderid: int
+        self.order_deadlines = {}               # vt_orderid: int, 撤单截止时间（毫秒）
+        self.order_timer_heap = []              # (deadline, vt_orderid)
         self.cancel_counter = {}                # vt_orderid: int
+        self.order_timer_active = False
+        self.order_timer_thread = None
 
         # 其它
         self.is_hedged_closed = False
@@ -189,12 +1178,50 @@ class FollowEngine(BaseEngine):
         self.sync_order_ref = 0
         self.refresh_pos_interval = 0
 
+        # 数据日志
+        self.journal_file = None
+        self.journal_unsynced = 0
+        self.journal_compact_count = 0
+
+        # 延迟统计
+        self.latency_stats = LatencyStats()
+        self.latency_log_count = 0
+
+        # 直接发单重入保护
+        self.is_dispatching = False
+        # 事件引擎线程标识，启动时由事件引擎线程记录
+        self.event_thread_id = None
+
+        # 其它跟单户
+        self.extra_targets = {}                 # gateway_name: FollowTarget
+
+        # 仓差推送变量
+        self.dirty_pos_symbols = set()
+        self.last_pos_deltas = {}               # vt_symbol: dict
+        self.next_pos_delta_flush = 0
+        self.pos_delta_suppressed = 0
+
+        # 热启动变量
+        self.warm_start_count = 0
+        self.warm_subscribe_symbols = set()
+
+        # 自动同步仓位变量
+        self.reconcile_dirty_symbols = set()
+        self.unfollowed_orderids = set()        # 委托模式下有意不跟随的源户委托，其成交不参与自动同步
+        self.reconcile_deltas = {}              # vt_symbol: (long_delta, short_delta)
+        self.reconcile_since = {}               # vt_symbol: int, 仓差出现时间（毫秒）
+        self.next_reconcile_time = 0
+
+        # 成交合并窗口变量
+        self.netting_trades = {}                # vt_symbol: list[(trade, receive_time)]
+        self.netting_deadlines = {}             # vt_symbol: int, 合并截止时间（毫秒）
+
         self.offset_converter = OffsetConverter(main_engine)
 
         # 参数如果是python object不能直接转化为json数据
         self.parameters = [
                            'source_gateway_name', 'target_gateway_name',
-                           'filter_trade_timeout', 'cancel_order_timeout',
+                           'filter_trade_timeout', 'cancel_order_timeout', 'order_timer_interval',
                            'multiples', 'follow_based', 'sync_base_price', 'is_keep_order_after_chase',
                            'tick_add', 'must_done_tick_add',
                            'inverse_follow',
@@ -204,22 +1231,42 @@ class FollowEngine(BaseEngine):
                            'single_max', 'single_max_dict',
                            'is_chase_order', 'chase_base_price', 'chase_base_last_order_price',
                            'chase_order_timeout', 'chase_order_tick_add', 'chase_max_resend',
-                           'is_intraday_trading', 'is_filter_order_vol', 'order_volumes_to_follow'
+                           'is_intraday_trading', 'is_filter_order_vol', 'order_volumes_to_follow',
+                           'is_journal_mode', 'journal_fsync_batch', 'journal_compact_interval',
+                           'latency_log_interval', 'is_direct_dispatch', 'netting_window',
+                           'pos_delta_interval',
+                           'log_level', 'log_event_level', 'log_rate_limit', 'log_sample_dict', 'is_log_to_file',
+                           'is_dedup_persist', 'dedup_memory_size',
+                           'reconcile_interval', 'reconcile_min_age', 'reconcile_max_orders',
+                           'is_warm_start', 'warm_start_interval',
+                           'extra_target_settings'
                            ]
         self.variables = ['tradeid_orderids_dict', 'positions']
         self.clear_variables = ['tradeid_orderids_dict']
+        # 仓位和信号单映射已由运行数据文件实时保存，快照只保存其它运行状态
+        self.warm_variables = [
+                               'open_orderids', 'intraday_orderids', 'first_orderids',
+                               'chase_orderids', 'chase_ancestor_dict', 'chase_resend_count_dict',
+                               'orderid_keep_hang', 'fail_chase_orderid', 'cancel_counter'
+                               ]
         self.pos_key = [
                         'source_long', 'source_short', 'source_net',
                         'target_long', 'target_short', 'target_net',
                         'net_delta', 'basic_delta',
                         'source_traded_net',
-                        'lost_follow_net'
+                        'lost_follow_net',
+                        'unfollowed_long', 'unfollowed_short'
                         ]
 
         self.load_data()
+        self.init_logger()
+        self.init_dedup_store()
         self.view_vars()
 
-        print("版本最后修改时间: 20230315 14:00")
+        # 初始化前收到的成交只登记成交号，不跟随，启动时无需遍历全部成交
+        self.event_engine.register(EVENT_TRADE, self.process_pre_init_trade_event)
+
+        self.write_log("版本最后修改时间: 20230315 14:00")
 
     def init_engine(self):
         """
@@ -227,10 +1274,14 @@ class FollowEngine(BaseEngine):
         """
         self.write_log("参数和数据读取成功。")
 
-        # 重要：启动前必须先更新已经记录过的tradeid
-        self.update_tradeids()
-        # print('vt_tradeids', self.vt_tradeids)
+        # 其它跟单户需在注册事件前创建，启动前的持仓、委托和成交推送才不会被当作主跟单户处理
+        self.init_extra_targets()
+
+        # 重要：初始化前收到的成交已由process_pre_init_trade_event登记，之后由成交事件处理
+        self.event_engine.unregister(EVENT_TRADE, self.process_pre_init_trade_event)
         self.register_event()
+        self.subscribe_warm_symbols()
+        self.start_order_timer()
 
         if self.run_type == FollowRunType.TEST:
             self.write_log("测试模式：订阅行情以获取最新时间。")
@@ -245,6 +1296,39 @@ class FollowEngine(BaseEngine):
         """
         self.load_follow_setting()
         self.load_follow_data()
+        self.load_warm_start()
+
+    def init_logger(self):
+        """
+        Apply log parameters to logger.
+        """
+        self.logger.level = self.log_level
+        self.logger.event_level = self.log_event_level
+        self.logger.rate_limit = self.log_rate_limit
+        self.logger.sample_dict = self.log_sample_dict
+        self.logger.is_to_file = self.is_log_to_file
+
+    def init_dedup_store(self):
+        """
+        Apply dedup parameters to tradeid and orderid stores.
+        """
+        filepath = str(get_file_path(self.dedup_filename)) if self.is_dedup_persist else ""
+        trading_day = DedupStore.get_trading_day(self.get_current_time())
+
+        for store in [self.vt_tradeids, self.vt_accepted_orderids]:
+            store.close()
+            store.filepath = filepath
+            store.capacity = self.dedup_memory_size
+            store.set_trading_day(trading_day)
+
+    def update_dedup_trading_day(self):
+        """
+        Flush dedup stores and switch to new trading day if changed.
+        """
+        trading_day = DedupStore.get_trading_day(self.get_current_time())
+        for store in [self.vt_tradeids, self.vt_accepted_orderids]:
+            store.flush()
+            store.set_trading_day(trading_day)
 
     def get_current_time(self):
         """"""
@@ -277,9 +1361,8 @@ class FollowEngine(BaseEngine):
         Get connected gateway names.
         """
         accounts = self.main_engine.get_all_accounts()
-        print(accounts)
         self.gateway_names = [account.gateway_name for account in accounts]
-        print(self.gateway_names)
+        self.write_log(f"已连接接口：{self.gateway_names}", DEBUG)
         return self.gateway_names
 
     def get_positions(self):
@@ -302,9 +1385,16 @@ class FollowEngine(BaseEngine):
         Load setting from setting file.
         """
         self.follow_setting = load_json(self.setting_filename)
-        print(self.follow_setting)
+        self.write_log(f"参数配置：{self.follow_setting}", DEBUG)
+        self.apply_follow_setting(self.follow_setting)
+        self.write_log("参数配置读取成功。")
+
+    def apply_follow_setting(self, setting: dict):
+        """
+        Set parameters by setting dict.
+        """
         for name in self.parameters:
-            value = self.follow_setting.get(name, None)
+            value = setting.get(name, None)
             if value is not None:
                 if name == 'order_type':
                     setattr(self, name, OrderType(value))
@@ -318,7 +1408,6 @@ class FollowEngine(BaseEngine):
                     setattr(self, name, OrderBasePrice(value))
                 else:
                     setattr(self, name, value)
-        self.write_log("参数配置读取成功。")
 
     def save_follow_setting(self):
         """
@@ -341,75 +1430,363 @@ class FollowEngine(BaseEngine):
             value = self.follow_data.get(name, None)
             if value:
                 setattr(self, name, value)
+
+        # 不论当前是否开启日志模式，残留的数据日志都回放并合并到快照后清空
+        # 否则关闭日志模式期间保存的新快照，在重新开启后会被旧日志覆盖
+        if self.replay_journal():
+            for name in self.variables:
+                self.follow_data[name] = getattr(self, name)
+            save_json(self.data_filename, self.follow_data)
+            self.truncate_journal()
+
+        self.rebuild_signal_index()
         self.write_log("运行数据读取成功。")
 
-    def save_follow_data(self):
+    def save_follow_data(self, vt_symbol: str = "", vt_tradeid: str = ""):
         """
         Save run data to data file.
+        In journal mode, only changed symbol pos or signal orderids are appended to journal file.
         """
+        if self.is_journal_mode and (vt_symbol or vt_tradeid):
+            if vt_symbol:
+                self.write_journal("positions", vt_symbol, self.positions.get(vt_symbol))
+            if vt_tradeid:
+                self.write_journal("tradeid_orderids_dict", vt_tradeid, self.tradeid_orderids_dict.get(vt_tradeid))
+            return
+
         for name in self.variables:
             self.follow_data[name] = getattr(self, name)
         save_json(self.data_filename, self.follow_data)
 
+        # 运行中关闭日志模式时，已写入的日志也要随快照清空
+        if self.is_journal_mode or self.journal_file is not None:
+            self.truncate_journal()
+
+    def write_journal(self, name: str, key: str, value):
+        """
+        Append a state mutation record to journal file, fsync in batches.
+        """
+        if self.journal_file is None:
+            self.journal_file = open(get_file_path(self.journal_filename), "a", encoding="utf-8")
+
+        record = json.dumps([name, key, value], ensure_ascii=False, separators=(",", ":"))
+        self.journal_file.write(record + "\n")
+        self.journal_unsynced += 1
+
+        if self.journal_unsynced >= self.journal_fsync_batch:
+            self.flush_journal()
+
+    def flush_journal(self):
+        """
+        Flush and fsync journal records not synced yet.
+        """
+        if self.journal_file is None or not self.journal_unsynced:
+            return
+
+        self.journal_file.flush()
+        os.fsync(self.journal_file.fileno())
+        self.journal_unsynced = 0
+
+    def close_journal(self):
+        """"""
+        self.flush_journal()
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
+
+    def truncate_journal(self):
+        """
+        Clear journal file after snapshot saved.
+        """
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
+        self.journal_unsynced = 0
+
+        journal_path = get_file_path(self.journal_filename)
+        if journal_path.exists():
+            open(journal_path, "w").close()
+
+    def replay_journal(self):
+        """
+        Replay journal records on snapshot loaded from data file. Return True if journal file is not empty.
+        """
+        journal_path = get_file_path(self.journal_filename)
+        if not journal_path.exists() or not journal_path.stat().st_size:
+            return False
+
+        count = 0
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    name, key, value = json.loads(line)
+                except ValueError:
+                    # 进程崩溃时最后一条记录可能不完整
+                    self.write_log(f"数据日志记录不完整，已忽略：{line.strip()}")
+                    continue
+
+                container = getattr(self, name)
+                if value is None:
+                    container.pop(key, None)
+                else:
+                    container[key] = value
+                count += 1
+
+        if count:
+            self.write_log(f"数据日志回放成功，记录数：{count}。")
+        return True
+
+    def checkpoint_warm_start(self):
+        """
+        Save warm start snapshot every warm_start_interval seconds.
+        """
+        if not self.is_warm_start:
+            return
+
+        self.warm_start_count += 1
+        if self.warm_start_count >= self.warm_start_interval:
+            self.save_warm_start()
+            self.warm_start_count = 0
+
+    def save_warm_start(self):
+        """
+        Save runtime state to binary snapshot. Write to temp file and replace, so snapshot is always complete.
+        """
+        now = self.get_current_time()
+        snapshot = {
+            "trading_day": DedupStore.get_trading_day(now),
+            "timestamp": now.timestamp(),
+            "variables": {name: getattr(self, name) for name in self.warm_variables},
+            "symbol_prices": {
+                vt_symbol: tuple(getattr(symbol_price, k) for k in SymbolPrice.__slots__)
+                for vt_symbol, symbol_price in {**self.warm_symbol_prices, **self.symbol_prices}.items()
+            },
+            "subscribe_symbols": (
+                self.pre_subscribe_symbols | self.warm_subscribe_symbols
+                | set(self.symbol_prices) | set(self.warm_symbol_prices)
+            )
+        }
+
+        filepath = get_file_path(self.warm_start_filename)
+        temp_path = filepath.with_name(filepath.name + ".tmp")
+        with open(temp_path, "wb") as f:
+            pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, filepath)
+
+    def load_warm_start(self):
+        """
+        Restore runtime state from snapshot saved in same trading day.
+        """
+        if not self.is_warm_start:
+            return
+
+        filepath = get_file_path(self.warm_start_filename)
+        if not filepath.exists():
+            return
+
+        try:
+            with open(filepath, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception:  # noqa
+            self.write_log(f"热启动快照读取失败：\n{traceback.format_exc()}", WARNING)
+            return
+
+        now = self.get_current_time()
+        if snapshot["trading_day"] != DedupStore.get_trading_day(now):
+            return
+
+        for name, value in snapshot["variables"].items():
+            if name in self.warm_variables:
+                setattr(self, name, value)
+
+        # 快照盘口价格可能已过时，收到该合约首个行情前不视为行情就绪，委托先排队
+        for vt_symbol, values in snapshot["symbol_prices"].items():
+            symbol_price = SymbolPrice(*values[:3])
+            for k, v in zip(SymbolPrice.__slots__, values):
+                setattr(symbol_price, k, v)
+            self.warm_symbol_prices[vt_symbol] = symbol_price
+
+        self.warm_subscribe_symbols = set(snapshot["subscribe_symbols"])
+        self.write_log(
+            f"热启动快照恢复成功，行情价格：{len(self.warm_symbol_prices)}，待订阅合约：{len(self.warm_subscribe_symbols)}"
+        )
+
+    def compact_follow_data(self):
+        """
+        Fsync journal every timer event and merge journal into snapshot periodically.
+        """
+        if not self.is_journal_mode:
+            return
+
+        self.flush_journal()
+        if self.journal_compact_count >= self.journal_compact_interval:
+            self.save_follow_data()
+            self.journal_compact_count = 0
+        self.journal_compact_count += 1
+
     def clear_follow_data(self):
         """
         Clear follow data after market closed
         """
+        if self.is_journal_mode:
+            # 日志模式下先合并为快照，保证历史数据完整
+            self.save_follow_data()
+
         if self.follow_data:
-            # 如果数据文件不存在就保存到历史文件
+            # 如果当天历史数据不存在就保存到历史库
             today = datetime.now().strftime('%Y%m%d')
-            fn = f"follow_history/{today}_{self.data_filename}"
-            fp = get_file_path(fn)
-            if not fp.exists():
-                save_json(fn, self.follow_data)
+            history_store = self.get_history_store()
+            if not history_store.has_date(today):
+                missing = history_store.save_follow_data(today, self.follow_data, self.get_follow_symbol_map())
+                if missing:
+                    self.write_log(f"保存历史跟单数据时有{missing}条委托找不到合约，合约代码留空。", WARNING)
                 self.write_log("清除临时数据并保存至历史成功。")
             else:
-                self.write_log("已有历史临时数据文件，无需覆盖。")
+                self.write_log("已有历史临时数据，无需覆盖。")
 
             # 清理临时变量
             for name in self.clear_variables:
                 self.follow_data[name].clear()
+            self.orderid_to_signal_orderid.clear()
+            self.unfollowed_orderids.clear()
+            self.latency_stats.clear()
             save_json(self.data_filename, self.follow_data)
 
-    def save_trade(self):
+    def get_history_store(self):
         """
-        Save trade record to file.
+        Open history store, json history files of old version are imported at first time.
         """
-        today = datetime.now().strftime('%Y%m%d')
-        trade_folder = get_folder_path('trade')
-        trade_file_path = trade_folder.joinpath(f"trade_{today}.csv")
+        if not self.history_store:
+            filepath = get_file_path(self.history_filename)
+            is_new = not filepath.exists()
 
-        gateway_dict = dict()
-        gateway_dict[self.source_gateway_name] = "source"
-        gateway_dict[self.target_gateway_name] = "target"
+            self.history_store = FollowHistoryStore(str(filepath))
+            if is_new:
+                self.import_follow_history()
+        return self.history_store
 
-        account_dict = dict()
-        accounts = self.main_engine.get_all_accounts()
-        for account in accounts:
-            account_dict[account.gateway_name] = account.accountid
+    def import_follow_history(self):
+        """
+        Import json files in follow_history folder into history store.
+        """
+        folder_path = get_folder_path("follow_history")
+        trade_folder = get_folder_path("trade")
+        count, missing = self.get_history_store().import_json_folder(folder_path, self.data_filename, trade_folder)
+        if count:
+            self.write_log(f"导入历史跟单数据文件{count}个。")
+        if missing:
+            self.write_log(f"导入历史跟单数据中有{missing}条委托在当日成交文件中找不到合约，合约代码留空。", WARNING)
+        return count
+
+    def get_follow_symbol_map(self):
+        """
+        Get vt_symbol of followed target orders and source trades.
+        """
+        symbol_map = {}
+        for vt_tradeid, vt_orderids in self.tradeid_orderids_dict.items():
+            trade = self.main_engine.get_trade(vt_tradeid)
+            if trade:
+                symbol_map[vt_tradeid] = trade.vt_symbol
+
+            for vt_orderid in vt_orderids:
+                order = self.main_engine.get_order(vt_orderid)
+                if order:
+                    symbol_map[vt_orderid] = order.vt_symbol
+        return symbol_map
+
+    def query_target_orderids(self, signal_id: str):
+        """
+        Query target orderids which followed the source vt_tradeid/vt_orderid, including history.
+        """
+        vt_orderids = list(self.tradeid_orderids_dict.get(signal_id, []))
+        for vt_orderid in self.get_history_store().query_target_orderids(signal_id):
+            if vt_orderid not in vt_orderids:
+                vt_orderids.append(vt_orderid)
+        return vt_orderids
+
+    def query_signal_id(self, vt_orderid: str):
+        """
+        Query source vt_tradeid/vt_orderid followed by the target order, including history.
+        """
+        signal_id = self.orderid_to_signal_orderid.get(vt_orderid, "")
+        if not signal_id:
+            signal_id = self.get_history_store().query_signal_id(vt_orderid)
+        return signal_id
+
+    def query_follow_history(self, start_date: str, end_date: str, vt_symbol: str = ""):
+        """
+        Query history follow orders, dates are YYYYMMDD and both included.
+        """
+        return self.get_history_store().query_follow_orders(start_date, end_date, vt_symbol)
+
+    def query_pos_history(self, start_date: str, end_date: str, vt_symbol: str = ""):
+        """
+        Query history positions, dates are YYYYMMDD and both included.
+        """
+        return self.get_history_store().query_positions(start_date, end_date, vt_symbol)
 
+    def save_trade(self):
+        """
+        Save trades which are not archived yet(such as trades before engine start) and flush trade file.
+        """
         trades = self.main_engine.get_all_trades()
-        trade_list = []
         for trade in trades:
-            d = copy(trade.__dict__)
-            d["exchange"] = d["exchange"].value
-            d["direction"] = d["direction"].value
-            d["offset"] = d["offset"].value
+            if not self.trade_archive.is_recorded(trade.vt_tradeid):
+                self.archive_trade(trade)
 
-            try:
-                d['dt'] = f"{today} {d['time']}"
-            except KeyError:
-                d['dt'] = d['datetime'].strftime("%Y%m%d %H:%M:%S")
-
-            d['date'] = f"{today}"
-            d.pop("vt_symbol")
-            trade_list.append(d)
-        df = pd.DataFrame(trade_list)
-        if not df.empty:
-            df['account_type'] = df['gateway_name'].map(gateway_dict)
-            df['account_id'] = df['gateway_name'].map(account_dict)
-            df.to_csv(trade_file_path, index=False, encoding='utf-8')
-            self.write_log("成交记录保存成功。")
+        self.trade_archive.flush()
+        self.write_log("成交记录保存成功。")
+
+    def archive_trade(self, trade: TradeData):
+        """
+        Append trade to daily trade file.
+        """
+        today = self.get_current_time().strftime('%Y%m%d')
+
+        trade_datetime = getattr(trade, "datetime", None)
+        if trade_datetime:
+            dt = trade_datetime.strftime("%Y%m%d %H:%M:%S")
+        else:
+            dt = f"{today} {trade.time}"
+
+        d = {
+            "gateway_name": trade.gateway_name,
+            "symbol": trade.symbol,
+            "exchange": trade.exchange.value,
+            "orderid": trade.orderid,
+            "tradeid": trade.tradeid,
+            "direction": trade.direction.value,
+            "offset": trade.offset.value,
+            "price": trade.price,
+            "volume": trade.volume,
+            "vt_orderid": trade.vt_orderid,
+            "vt_tradeid": trade.vt_tradeid,
+            "dt": dt,
+            "date": today,
+            "account_type": self.get_account_type(trade.gateway_name),
+            "account_id": self.get_account_id(trade.gateway_name)
+        }
+        self.trade_archive.add_record(d)
+
+    def get_account_type(self, gateway_name: str):
+        """"""
+        if gateway_name == self.source_gateway_name:
+            return "source"
+        elif gateway_name == self.target_gateway_name or gateway_name in self.extra_targets:
+            return "target"
+        else:
+            return ""
+
+    def get_account_id(self, gateway_name: str):
+        """"""
+        accountid = self.account_ids.get(gateway_name, None)
+        if accountid is None:
+            for account in self.main_engine.get_all_accounts():
+                self.account_ids[account.gateway_name] = account.accountid
+            accountid = self.account_ids.get(gateway_name, "")
+        return accountid
 
     def save_account_info(self):
         """
@@ -427,14 +1804,12 @@ class FollowEngine(BaseEngine):
             f.write(account_text)
         self.write_log("账户信息保存成功。")
 
-    def update_tradeids(self):
+    def process_pre_init_trade_event(self, event: Event):
         """
-        Update received tradeids from main engine
+        Record tradeid received before engine inited, so it won't be followed when pushed again.
         """
-        trades = self.main_engine.get_all_trades()
-        tradeids = [trade.vt_tradeid for trade in trades]
-        self.vt_tradeids.update(set(tradeids))
-        self.write_log("成交单列表更新成功。")
+        trade = event.data
+        self.vt_tradeids.add(trade.vt_tradeid, DedupStore.get_ts(trade))
 
     def auto_save_trade(self):
         """
@@ -463,7 +1838,16 @@ class FollowEngine(BaseEngine):
             self.write_log("跟随接口和发单接口不能是同一个。")
             return False
 
+        if not self.init_extra_targets():
+            return False
+        self.refresh_target_positions()
+        self.rebuild_order_deadlines()
+        self.start_extra_targets()
+
         self.is_active = True
+        self.reconcile_dirty_symbols.update(self.positions.keys())
+        # 由事件引擎线程记录自身线程标识，记录前一律走事件队列发单
+        self.event_engine.put(Event(EVENT_FOLLOW_START))
         self.write_log("跟随交易启动。")
 
         return True
@@ -476,7 +1860,11 @@ class FollowEngine(BaseEngine):
             self.write_log("跟随交易尚未启动。")
             return False
 
+        # 停止前先跟随合并窗口内的成交
+        self.flush_netting_trades(force=True)
+
         self.is_active = False
+        self.stop_extra_targets()
 
         # 停止系统是否撤单
         # self.cancel_all_order()
@@ -486,6 +1874,9 @@ class FollowEngine(BaseEngine):
         self.clear_empty_pos()
         self.clear_expired_pos()
 
+        # 停止时不等待刷新间隔，立即推送界面仓位差
+        self.flush_pos_delta(force=True)
+
         self.save_follow_setting()
         self.save_follow_data()
 
@@ -500,11 +1891,107 @@ class FollowEngine(BaseEngine):
             self.save_account_info()
         return True
 
+    def init_extra_targets(self):
+        """
+        Create extra targets by setting, so their events are routed to them before start.
+        Targets already created keep their position and offset converter, only setting is updated.
+        """
+        gateway_names = []
+        for d in self.extra_target_settings:
+            gateway_name = d["gateway_name"]
+            if gateway_name in [self.source_gateway_name, self.target_gateway_name] or gateway_name in gateway_names:
+                self.write_log(f"其它跟单户接口{gateway_name}与已有接口重复。")
+                return False
+            gateway_names.append(gateway_name)
+
+        for gateway_name in list(self.extra_targets.keys()):
+            if gateway_name not in gateway_names:
+                self.extra_targets.pop(gateway_name).close()
+                self.write_log(f"其它跟单户{gateway_name}已从配置中移除。")
+
+        for d in self.extra_target_settings:
+            gateway_name = d["gateway_name"]
+            target = self.extra_targets.get(gateway_name, None)
+            if target:
+                target.update_setting(d.get("multiples", 1), d.get("skip_contracts", []))
+            else:
+                self.extra_targets[gateway_name] = FollowTarget(
+                    self,
+                    gateway_name,
+                    d.get("multiples", 1),
+                    d.get("skip_contracts", [])
+                )
+        return True
+
+    def refresh_target_positions(self):
+        """
+        Update positions and offset converters of all targets from main engine in one pass,
+        since target gateway may be changed or reconnected before start.
+        """
+        gateway_positions = defaultdict(list)
+        for position in self.main_engine.get_all_positions():
+            gateway_positions[position.gateway_name].append(position)
+
+        positions = gateway_positions.get(self.target_gateway_name, [])
+        self.offset_converter.update_positions(positions)
+        for position in positions:
+            self.update_target_pos_by_pos(position)
+
+        for gateway_name, target in self.extra_targets.items():
+            target.update_positions(gateway_positions.get(gateway_name, []))
+
+    def rebuild_order_deadlines(self):
+        """
+        Restart timeout counting of active follow orders, deadlines are monotonic time and can not be restored.
+        """
+        for order in self.main_engine.get_all_active_orders():
+            vt_orderid = order.vt_orderid
+            if order.gateway_name != self.target_gateway_name or vt_orderid in self.order_deadlines:
+                continue
+
+            if not self.filter_target_not_follow(vt_orderid) or vt_orderid in self.fail_chase_orderid:
+                continue
+
+            if self.follow_based == FollowBaseMode.BASE_ORDER:
+                signal_orderid = self.orderid_to_signal_orderid.get(vt_orderid)
+                if signal_orderid and signal_orderid in self.orderid_keep_hang:
+                    continue
+
+            self.add_order_deadline(vt_orderid)
+            self.cancel_counter.setdefault(vt_orderid, 0)
+
+    def start_extra_targets(self):
+        """
+        Start worker of each extra target gateway.
+        """
+        for target in self.extra_targets.values():
+            target.start()
+            self.write_log(f"其它跟单户{target.gateway_name}启动，倍数：{target.multiples}。")
+
+    def stop_extra_targets(self):
+        """"""
+        for target in self.extra_targets.values():
+            target.stop()
+
     def close(self):
         """
         Close engine.
         """
         self.stop()
+        for target in self.extra_targets.values():
+            target.close()
+        self.offset_converter.close()
+        self.close_journal()
+        if self.is_warm_start:
+            self.save_warm_start()
+        self.stop_order_timer()
+        self.vt_tradeids.close()
+        self.vt_accepted_orderids.close()
+        with self.trade_archive.lock:
+            self.trade_archive.close()
+        if self.history_store:
+            self.history_store.close()
+        self.logger.close()
 
     def save_contract(self):
         """
@@ -549,11 +2036,23 @@ class FollowEngine(BaseEngine):
         """
         Get trade/order time for compartility with old version
         """
-        try:
-            trade_time = trade.time
-        except AttributeError:
-            trade_time = trade.datetime.strftime("%H:%M:%S")
-        return trade_time
+        trade_datetime = getattr(trade, "datetime", None)
+        if trade_datetime:
+            return trade_datetime.strftime("%H:%M:%S")
+        return trade.time
+
+    @staticmethod
+    def get_trade_seconds(trade: Union[OrderData, TradeData]):
+        """
+        Get trade/order time as seconds from midnight.
+        """
+        trade_datetime = getattr(trade, "datetime", None)
+        if trade_datetime:
+            return trade_datetime.hour * 3600 + trade_datetime.minute * 60 + trade_datetime.second
+
+        # 旧版本只有时间字符串
+        hour, minute, second = trade.time.split(":")
+        return int(hour) * 3600 + int(minute) * 60 + int(second)
 
     @staticmethod
     def get_trade_type(trade: TradeData):
@@ -618,22 +2117,58 @@ class FollowEngine(BaseEngine):
     def register_event(self):
         """"""
         self.event_engine.register(EVENT_TICK, self.process_tick_event)
+        self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
         self.event_engine.register(EVENT_ORDER, self.process_order_event)
         self.event_engine.register(EVENT_TRADE, self.process_trade_event)
         self.event_engine.register(EVENT_POSITION, self.process_position_event)
         self.event_engine.register(EVENT_TIMER, self.process_timer_event)
         self.event_engine.register(EVENT_FOLLOW_ORDER, self.process_follow_order_event)
         self.event_engine.register(EVENT_FOLLOW_MODIFY_POS, self.process_follow_modify_pos_event)
+        self.event_engine.register(EVENT_FOLLOW_TIMER, self.process_follow_timer_event)
+        self.event_engine.register(EVENT_FOLLOW_START, self.process_follow_start_event)
 
     def process_tick_event(self, event: Event):
         """"""
-        tick = event.data
-        self.tick_time = tick.datetime
-        self.init_limited_price(tick)
-        self.update_latest_price(tick)
+        try:
+            tick = event.data
+            self.tick_time = tick.datetime
+            self.update_latest_price(tick)
+
+            # 行情初始化完成后立即发送该合约排队中的委托
+            if tick.vt_symbol in self.due_out_req_dict:
+                self.send_queue_order(tick.vt_symbol)
+
+            for target in self.extra_targets.values():
+                if tick.vt_symbol in target.due_out_req_dict:
+                    self.send_target_queue_order(target, tick.vt_symbol)
+        except:  # noqa
+            msg = f"处理行情事件，触发异常：\n{traceback.format_exc()}"
+            self.write_log(msg)
+
+    def subscribe_warm_symbols(self):
+        """
+        Subscribe symbols of last run in bulk, the rest is subscribed when contract is received.
+        """
+        for vt_symbol in list(self.warm_subscribe_symbols):
+            if self.subscribe(vt_symbol):
+                self.warm_subscribe_symbols.remove(vt_symbol)
+                self.pre_subscribe_symbols.add(vt_symbol)
+
+    def process_contract_event(self, event: Event):
+        """
+        Subscribe symbols of last run as soon as contract is received.
+        """
+        if not self.warm_subscribe_symbols:
+            return
+
+        vt_symbol = event.data.vt_symbol
+        if vt_symbol in self.warm_subscribe_symbols and self.subscribe(vt_symbol):
+            self.warm_subscribe_symbols.remove(vt_symbol)
+            self.pre_subscribe_symbols.add(vt_symbol)
 
     def is_duplicated_order(self, order: OrderData):
-        if order.vt_orderid in self.vt_accepted_orderids:
+        ts = DedupStore.get_ts(order)
+        if self.vt_accepted_orderids.contains(order.vt_orderid, ts):
             # 若源户已处理的委托全部成交，并且此单已经成功提交跟单到交易所，才允许追单计时
             # 因为本次回报ID之前已登记过了，所以委托成交后，需要在检查去重之前就开始做追单计时，否则会被去重功能过滤掉
             if order.status in [Status.ALLTRADED] and order.vt_orderid in self.tradeid_orderids_dict:
@@ -649,17 +2184,16 @@ class FollowEngine(BaseEngine):
                         # order_偶尔会变成空值导致报错
                         if order_ is not None:
                             if not order_.is_active():
-                                print(f"{vt_orderid}已经不是活动委托")
+                                self.write_log(f"{vt_orderid}已经不是活动委托", DEBUG)
                                 continue
 
                         # 开始计时
-                        self.active_order_set.add(vt_orderid)
-                        self.active_order_counter[vt_orderid] = 0
+                        self.add_order_deadline(vt_orderid)
                         self.cancel_counter[vt_orderid] = 0
 
             return True
         else:
-            self.vt_accepted_orderids.add(order.vt_orderid)
+            self.vt_accepted_orderids.add(order.vt_orderid, ts)
             return False
 
     def process_order_event(self, event: Event):
@@ -667,9 +2201,15 @@ class FollowEngine(BaseEngine):
         process order from target gateway.
         """
         try:
+            receive_time = monotonic()
             order = event.data
             vt_orderid = order.vt_orderid
 
+            target = self.extra_targets.get(order.gateway_name, None)
+            if target:
+                target.update_order(order)
+                return
+
             if order.gateway_name == self.source_gateway_name:
 
                 if self.follow_based == FollowBaseMode.BASE_TRADE:
@@ -685,13 +2225,17 @@ class FollowEngine(BaseEngine):
 
                     if not self.is_active:
                         self.write_log(f"委托单{order.vt_orderid}不跟随，系统尚未启动。")
+                        self.unfollowed_orderids.add(order.vt_orderid)
                         return
 
                     # 功能过滤
                     if not self.filter_source_order(order):
+                        if order.vt_orderid not in self.tradeid_orderids_dict:
+                            self.unfollowed_orderids.add(order.vt_orderid)
                         return
 
                     self.write_log(f"委托单{order.vt_orderid}核验通过，执行跟随。")
+                    self.latency_stats.stamp(order.vt_orderid, "receive", order.vt_symbol, ts=receive_time)
 
                     # 核验成功
                     # 跟随委托模式暂不支持开平转换和日内交易开平计算，直接发单
@@ -702,7 +2246,7 @@ class FollowEngine(BaseEngine):
                 # 若源户委托未成交（挂单）或部分成交，则该委托加入保留队列，跟单户通过这个名单来判断是否会被撤单
                 # 若源户直接全部成交，则不加入保留名单，处理跟单户的委托时就会做追单计时
                 if order.status in [Status.NOTTRADED, Status.PARTTRADED]:
-                    print(f"{order.vt_orderid}已加入保留委托列表")
+                    self.write_log(f"{order.vt_orderid}已加入保留委托列表", DEBUG)
                     self.orderid_keep_hang.add(order.vt_orderid)
 
                 # 源户主动撤单
@@ -718,6 +2262,10 @@ class FollowEngine(BaseEngine):
                 # 更新offset converter
                 self.offset_converter.update_order(order)
 
+                # 撤单或拒单不会再有成交，清理延迟统计；全部成交的由成交回报清理，避免委托回报先到丢失样本
+                if not order.is_active() and order.status != Status.ALLTRADED:
+                    self.latency_stats.on_order_finished(vt_orderid)
+
                 # 过滤与跟随系统无关的委托
                 if not self.filter_target_not_follow(order.vt_orderid):
                     # self.write_log(f"{order.vt_orderid}不是跟随策略产生的委托。")
@@ -732,17 +2280,14 @@ class FollowEngine(BaseEngine):
                     if self.follow_based == FollowBaseMode.BASE_ORDER:
                         signal_orderid = self.orderid_to_signal_orderid.get(order.vt_orderid)
                         if signal_orderid and signal_orderid in self.orderid_keep_hang:
-                            print("属于保留委托，不执行撤单超时计算")
+                            self.write_log(f"{vt_orderid}属于保留委托，不执行撤单超时计算", DEBUG, "keep_hang")
                             return
 
                     # 非保留委托单（源户成交），开始做追单计时
-                    self.active_order_set.add(vt_orderid)
-                    self.active_order_counter[vt_orderid] = 0
+                    self.add_order_deadline(vt_orderid)
                     self.cancel_counter[vt_orderid] = 0
                 else:
-                    if vt_orderid in self.active_order_set:
-                        self.active_order_counter.pop(vt_orderid)
-                        self.active_order_set.remove(vt_orderid)
+                    self.order_deadlines.pop(vt_orderid, None)
 
                     # 追单逻辑
                     if order.status == Status.CANCELLED:
@@ -771,14 +2316,18 @@ class FollowEngine(BaseEngine):
     def process_trade_event(self, event: Event):
         """"""
         try:
+            receive_time = monotonic()
             trade = event.data
 
             # 断线重连，过滤重复推送的成交
-            if trade.vt_tradeid in self.vt_tradeids:
-                self.write_log(f"{trade.vt_tradeid}是重复推送。")
+            ts = DedupStore.get_ts(trade)
+            if self.vt_tradeids.contains(trade.vt_tradeid, ts):
+                self.write_log(f"{trade.vt_tradeid}是重复推送。", INFO, "duplicate_trade")
                 return
             else:
-                self.vt_tradeids.add(trade.vt_tradeid)
+                self.vt_tradeids.add(trade.vt_tradeid, ts)
+
+            self.archive_trade(trade)
 
             if trade.gateway_name == self.source_gateway_name:
                 # 更新源户持仓并刷新UI
@@ -786,71 +2335,203 @@ class FollowEngine(BaseEngine):
 
                 # 此过滤放前面，不然在委托模式未启动前会收到“系统未启动成交不跟随”的提示，容易引起错误理解
                 if self.follow_based == FollowBaseMode.BASE_ORDER:
+                    if trade.vt_orderid in self.unfollowed_orderids:
+                        self.add_unfollowed_trade(trade)
                     return
 
                 # 核验源户的成交单
                 if not self.is_active:
                     self.write_log(f"成交单{trade.vt_tradeid}不跟随，系统尚未启动。")
+                    self.add_unfollowed_trade(trade)
                     return
 
-                if not self.filter_source_trade(trade):
+                if not self.filter_source_trade(trade, is_check_skip=False):
+                    if trade.vt_tradeid not in self.tradeid_orderids_dict:
+                        self.add_unfollowed_trade(trade)
                     return
 
-                # 将原始成交单进行平今平仓拆分
-                if not self.is_intraday_trading:
-                    trade_dict = self.get_trade_dict(trade, True)
-                    trades = [trade_dict]
-                else:
-                    trades = self.split_trade_to_open_close(trade)
-
-                    # 更新源户成交头寸，刷新UI并保存
-                    self.update_source_traded_net(trade.vt_symbol, self.get_trade_net_vol(trade))
-                    self.save_follow_data()
-
-                self.write_log(f"成交单{trade.vt_tradeid}核验通过，执行跟随。")
+                # 其它跟单户各自判断禁止同步合约
+                self.fan_out_trade(trade)
 
-                # 处理核验通过的成交
-                for trade_dict in trades:
-                    trade = trade_dict['trade']
-                    is_must_done = trade_dict['is_must_done']
-                    # print(trade.vt_tradeid, 'must_done:', is_must_done)
+                # 过滤黑名单合约
+                if self.is_skip_contract_trade(trade):
+                    return
 
-                    # 生成基于成交单的发单请求
-                    req = self.convert_trade_to_order_req(trade, is_must_done)
-                    if not req:
-                        continue
+                # 开启合并窗口时，成交先进入窗口，到期后合并跟随
+                if self.netting_window:
+                    self.add_netting_trade(trade, receive_time)
+                    return
 
-                    # 将订单压入待处理列表，由事件引擎执行实际发单，防止线程冲突
-                    self.send_order(req, trade.vt_tradeid, is_must_done)
+                self.follow_source_trade(trade, receive_time)
+            elif trade.gateway_name in self.extra_targets:
+                self.extra_targets[trade.gateway_name].update_trade(trade)
             else:
+                self.latency_stats.on_fill(trade.vt_orderid)
                 self.offset_converter.update_trade(trade)
                 self.update_target_pos_by_trade(trade)
 
                 if not self.filter_target_not_follow(trade.vt_orderid):
-                    self.write_log(f"{trade.vt_tradeid} 不是跟随策略的成交单。")
+                    self.write_log(f"{trade.vt_tradeid} 不是跟随策略的成交单。", DEBUG, "not_follow_trade")
                     return
 
-                self.save_follow_data()
+                self.save_follow_data(vt_symbol=trade.vt_symbol)
                 self.write_log(f"{trade.vt_symbol}仓位更新成功。")
 
         except:  # noqa
             msg = f"处理成交事件，触发异常：\n{traceback.format_exc()}"
             self.write_log(msg)
 
+    def follow_source_trade(self, trade: TradeData, receive_time: float):
+        """
+        Follow source trade passed all filters.
+        """
+        # 将原始成交单进行平今平仓拆分
+        if not self.is_intraday_trading:
+            trade_dict = self.get_trade_dict(trade, True)
+            trades = [trade_dict]
+        else:
+            trades = self.split_trade_to_open_close(trade)
+
+            # 更新源户成交头寸，刷新UI并保存
+            self.update_source_traded_net(trade.vt_symbol, self.get_trade_net_vol(trade))
+            self.save_follow_data(vt_symbol=trade.vt_symbol)
+
+        self.write_log(f"成交单{trade.vt_tradeid}核验通过，执行跟随。")
+        self.latency_stats.stamp(trade.vt_tradeid, "receive", trade.vt_symbol, ts=receive_time)
+
+        # 处理核验通过的成交
+        for trade_dict in trades:
+            trade = trade_dict['trade']
+            is_must_done = trade_dict['is_must_done']
+            # print(trade.vt_tradeid, 'must_done:', is_must_done)
+
+            # 生成基于成交单的发单请求
+            req = self.convert_trade_to_order_req(trade, is_must_done)
+            if not req:
+                continue
+
+            # 将订单压入待处理列表，由事件引擎执行实际发单，防止线程冲突
+            self.send_order(req, trade.vt_tradeid, is_must_done)
+
+    def add_netting_trade(self, trade: TradeData, receive_time: float):
+        """
+        Put source trade into netting window of its symbol.
+        """
+        vt_symbol = trade.vt_symbol
+        if self.netting_trades.get(vt_symbol, None) is None:
+            self.netting_trades[vt_symbol] = []
+            self.netting_deadlines[vt_symbol] = self.get_monotonic_ms() + self.netting_window
+        self.netting_trades[vt_symbol].append((trade, receive_time))
+
+    def flush_netting_trades(self, force: bool = False):
+        """
+        Follow netted trades of symbols whose netting window expired.
+        """
+        if not self.netting_deadlines:
+            return
+
+        now = self.get_monotonic_ms()
+        for vt_symbol, deadline in list(self.netting_deadlines.items()):
+            if not force and deadline > now:
+                continue
+
+            self.netting_deadlines.pop(vt_symbol)
+            trade_list = self.netting_trades.pop(vt_symbol)
+            receive_time = trade_list[0][1]
+
+            for trade, tradeids in self.net_trades([trade for trade, _ in trade_list]):
+                # 被合并的成交单登记为已跟随并立即保存，合并后的跟随单记录在合并成交的单号下
+                # 净额为0时不发单，所有成交单都登记为已跟随，防止重连后重复推送被单独跟随
+                if trade.volume:
+                    absorbed_tradeids = [i for i in tradeids if i != trade.vt_tradeid]
+                else:
+                    absorbed_tradeids = tradeids
+
+                for vt_tradeid in absorbed_tradeids:
+                    self.get_follow_orderids(vt_tradeid)
+
+                if absorbed_tradeids:
+                    if self.is_journal_mode:
+                        for vt_tradeid in absorbed_tradeids:
+                            self.save_follow_data(vt_tradeid=vt_tradeid)
+                    else:
+                        self.save_follow_data()
+
+                if len(tradeids) > 1:
+                    self.write_log(f"{vt_symbol}合并成交单{len(tradeids)}笔，合并后手数：{trade.volume}。")
+
+                if trade.volume:
+                    self.follow_source_trade(trade, receive_time)
+
+    def net_trades(self, trades: list):
+        """
+        Sum trades with same direction and offset.
+        In intraday mode, opposite trades are netted to one trade.
+        Merged trade is copied from the first trade of its group (in intraday mode,
+        the first trade with net direction), so the follow order is recorded under its vt_tradeid.
+        Return list of (merged trade, list of vt_tradeid merged).
+        """
+        if self.is_intraday_trading:
+            net_vol = sum(self.get_trade_net_vol(trade) for trade in trades)
+            tradeids = [trade.vt_tradeid for trade in trades]
+
+            direction = Direction.LONG if net_vol >= 0 else Direction.SHORT
+            base_trade = trades[0]
+            for trade in trades:
+                if trade.direction == direction:
+                    base_trade = trade
+                    break
+
+            merged = copy(base_trade)
+            merged.direction = direction
+            merged.volume = abs(net_vol)
+            if not net_vol:
+                self.write_log(f"{merged.vt_symbol}合并窗口内成交净额为0，无需跟随。")
+            return [(merged, tradeids)]
+
+        groups = {}
+        for trade in trades:
+            key = (trade.direction, trade.offset)
+            if key not in groups:
+                groups[key] = (copy(trade), [trade.vt_tradeid])
+            else:
+                merged, tradeids = groups[key]
+                merged.volume += trade.volume
+                tradeids.append(trade.vt_tradeid)
+        return list(groups.values())
+
     def process_timer_event(self, event: Event):
         """"""
         try:
-            self.send_queue_order()
-            self.cancel_timeout_order()
             self.auto_save_trade()
+            self.compact_follow_data()
+            self.checkpoint_warm_start()
+            self.update_dedup_trading_day()
+            self.reconcile_pos()
+            self.log_latency_summary()
         except:  # noqa
             msg = f"处理定时事件，触发异常：\n{traceback.format_exc()}"
             self.write_log(msg)
 
+    def process_follow_timer_event(self, event: Event):
+        """"""
+        try:
+            self.cancel_timeout_order()
+            self.flush_netting_trades()
+            self.flush_pos_delta()
+        except:  # noqa
+            msg = f"处理FollowTimer事件，触发异常：\n{traceback.format_exc()}"
+            self.write_log(msg)
+
+    def process_follow_start_event(self, event: Event):
+        """"""
+        self.event_thread_id = get_ident()
+
     def process_follow_order_event(self, event: Event):
         """"""
         try:
             req, vt_tradeid, is_must_done = event.data
+            self.latency_stats.stamp(vt_tradeid, "dispatch")
             self.send_and_record(req, vt_tradeid, is_must_done)
         except:
             msg = f"处理FollowOrder事件，触发异常：\n{traceback.format_exc()}"
@@ -865,7 +2546,7 @@ class FollowEngine(BaseEngine):
             self.set_pos(vt_symbol, 'lost_follow_net', modify_pos_dict['lost_follow_net'])
 
             self.put_pos_delta_event(vt_symbol)
-            self.save_follow_data()
+            self.save_follow_data(vt_symbol=vt_symbol)
             self.write_log(f"{vt_symbol}仓位修改成功")
         except:
             msg = f"处理FollowModifyPos事件，触发异常：\n{traceback.format_exc()}"
@@ -886,6 +2567,8 @@ class FollowEngine(BaseEngine):
             # 但是只要有新的成交即可恢复正常。
             if position.gateway_name == self.source_gateway_name:
                 self.update_source_pos_by_pos(position)
+            elif position.gateway_name in self.extra_targets:
+                self.extra_targets[position.gateway_name].update_position(position)
             else:
                 self.offset_converter.update_position(position)
                 self.update_target_pos_by_pos(position)
@@ -903,7 +2586,7 @@ class FollowEngine(BaseEngine):
         symbol_pos['lost_follow_net'] += lost_vol
 
         self.put_pos_delta_event(order.vt_symbol)
-        self.save_follow_data()
+        self.save_follow_data(vt_symbol=order.vt_symbol)
 
     def split_trade_to_open_close(self, trade: TradeData):
         """
@@ -957,45 +2640,92 @@ class FollowEngine(BaseEngine):
                 self.pre_subscribe_symbols.add(vt_symbol)
                 self.write_log(f"{vt_symbol}行情订阅请求已发送。")
 
+    def start_order_timer(self):
+        """
+        Start dedicated thread to put high resolution timer event for order timeout.
+        """
+        if self.order_timer_active:
+            return
+
+        self.order_timer_active = True
+        self.order_timer_thread = Thread(target=self.run_order_timer, daemon=True)
+        self.order_timer_thread.start()
+
+    def stop_order_timer(self):
+        """"""
+        if not self.order_timer_active:
+            return
+
+        self.order_timer_active = False
+        self.order_timer_thread.join()
+
+    def run_order_timer(self):
+        """"""
+        while self.order_timer_active:
+            sleep(self.order_timer_interval)
+
+            # 没有计时委托和合并中的成交时不推送事件，避免占用事件队列
+            if self.order_deadlines or self.netting_deadlines or self.dirty_pos_symbols:
+                self.event_engine.put(Event(EVENT_FOLLOW_TIMER))
+
+    @staticmethod
+    def get_monotonic_ms():
+        """"""
+        return int(monotonic() * 1000)
+
+    def get_cancel_timeout(self, vt_orderid: str):
+        """
+        Get cancel timeout and log prefix of order.
+        """
+        if vt_orderid in self.chase_orderids:
+            # 追单委托中再判断一下，是否为第一笔委托
+            if vt_orderid in self.first_orderids:
+                return self.cancel_order_timeout, "普通"
+            else:
+                return self.chase_order_timeout, "追单"
+        else:
+            return self.cancel_order_timeout, "普通"
+
+    def add_order_deadline(self, vt_orderid: str):
+        """
+        Start or restart timeout counting of order.
+        """
+        cancel_timeout, _ = self.get_cancel_timeout(vt_orderid)
+        deadline = self.get_monotonic_ms() + int(cancel_timeout * 1000)
+
+        # 旧的堆元素不删除，弹出时与order_deadlines不一致即视为失效
+        self.order_deadlines[vt_orderid] = deadline
+        heapq.heappush(self.order_timer_heap, (deadline, vt_orderid))
+
     def cancel_timeout_order(self):
         """
         Cancel active order if timeout exceed specified value.
         """
-        for vt_orderid, counter in copy(self.active_order_counter).items():
-            print("counter:", vt_orderid, counter)
-            if counter is None:
+        now = self.get_monotonic_ms()
+        heap = self.order_timer_heap
+
+        while heap and heap[0][0] <= now:
+            deadline, vt_orderid = heapq.heappop(heap)
+            if self.order_deadlines.get(vt_orderid) != deadline:
                 continue
 
-            # 3.6以上版本timer event差不多1秒1次，不用加乘数，旧版本大约1秒2次，要加乘数
-            if vt_orderid in self.chase_orderids:
-                # 追单委托中再判断一下，是否为第一笔委托
-                if vt_orderid in self.first_orderids:
-                    cancel_timeout = self.cancel_order_timeout
-                    prefix = "普通"
-                else:
-                    cancel_timeout = self.chase_order_timeout
-                    prefix = "追单"
-            else:
-                cancel_timeout = self.cancel_order_timeout
-                prefix = "普通"
+            _, prefix = self.get_cancel_timeout(vt_orderid)
 
             cancel_counter = self.cancel_counter.get(vt_orderid, None)
             if cancel_counter and cancel_counter > self.max_cancel:
                 self.write_log(f"{prefix}委托单{vt_orderid} 撤单超过{self.max_cancel}次，停止撤单。")
-                self.active_order_counter.pop(vt_orderid)
-                self.active_order_set.remove(vt_orderid)
+                self.order_deadlines.pop(vt_orderid)
                 continue
 
-            if counter > cancel_timeout:
-                self.cancel_order(vt_orderid, is_allow_resend=True)
-                self.active_order_counter[vt_orderid] = 0
-                self.cancel_counter[vt_orderid] += 1
-                self.write_log(f"{prefix}委托单{vt_orderid} 超过最大等待时间，已执行撤单。")
+            self.cancel_order(vt_orderid, is_allow_resend=True)
+            self.cancel_counter[vt_orderid] += 1
+            self.write_log(f"{prefix}委托单{vt_orderid} 超过最大等待时间，已执行撤单。")
 
-            self.active_order_counter[vt_orderid] += 1
+            self.add_order_deadline(vt_orderid)
 
     def resend_order(self, order: OrderData, base_last_order_price: bool = True):
         """"""
+        dispatch_time = monotonic()
         new_volume = order.volume - order.traded
 
         if base_last_order_price:
@@ -1022,6 +2752,7 @@ class FollowEngine(BaseEngine):
         )
 
         vt_orderid = self.main_engine.send_order(req, self.target_gateway_name)
+        self.latency_stats.on_chase_sent(vt_orderid, order.vt_symbol, dispatch_time)
         self.chase_orderids.add(vt_orderid)
         self.chase_ancestor_dict[vt_orderid] = ancestor_orderid
         self.chase_resend_count_dict[ancestor_orderid] += 1
@@ -1073,6 +2804,9 @@ class FollowEngine(BaseEngine):
         """
         For Test Only.
         """
+        if self.log_level > DEBUG:
+            return
+
         print("对象实例属性：")
         print("#" * 50)
         for key, value in self.__dict__.items():
@@ -1109,6 +2843,15 @@ class FollowEngine(BaseEngine):
                 self.positions.pop(symbol)
                 self.write_log(f"{symbol}已过期，清除成功。")
 
+    def rebuild_signal_index(self):
+        """
+        Rebuild reverse index of vt_orderid to signal id from tradeid_orderids_dict.
+        """
+        self.orderid_to_signal_orderid.clear()
+        for vt_tradeid, orderids_list in self.tradeid_orderids_dict.items():
+            for orderid in orderids_list:
+                self.orderid_to_signal_orderid[orderid] = vt_tradeid
+
     def get_follow_orderids(self, vt_tradeid: str):
         """"""
         if self.tradeid_orderids_dict.get(vt_tradeid) is None:
@@ -1146,10 +2889,12 @@ class FollowEngine(BaseEngine):
             return
 
         symbol_pos = self.get_symbol_pos(position.vt_symbol)
-        if position.direction == Direction.LONG:
-            symbol_pos['source_long'] = position.volume
-        else:
-            symbol_pos['source_short'] = position.volume
+        pos_key = 'source_long' if position.direction == Direction.LONG else 'source_short'
+
+        # 持仓未变化且已推送过仓差的，不再重复计算推送
+        if symbol_pos[pos_key] == position.volume and position.vt_symbol in self.last_pos_deltas:
+            return
+        symbol_pos[pos_key] = position.volume
 
         symbol_pos['source_net'] = symbol_pos['source_long'] - symbol_pos['source_short']
         symbol_pos['net_delta'] = symbol_pos['source_net'] * self.multiples - symbol_pos['target_net']
@@ -1162,10 +2907,12 @@ class FollowEngine(BaseEngine):
             return
 
         symbol_pos = self.get_symbol_pos(position.vt_symbol)
-        if position.direction == Direction.LONG:
-            symbol_pos['target_long'] = position.volume
-        else:
-            symbol_pos['target_short'] = position.volume
+        pos_key = 'target_long' if position.direction == Direction.LONG else 'target_short'
+
+        # 持仓未变化且已推送过仓差的，不再重复计算推送
+        if symbol_pos[pos_key] == position.volume and position.vt_symbol in self.last_pos_deltas:
+            return
+        symbol_pos[pos_key] = position.volume
 
         symbol_pos['target_net'] = symbol_pos['target_long'] - symbol_pos['target_short']
         symbol_pos['net_delta'] = symbol_pos['source_net'] * self.multiples - symbol_pos['target_net']
@@ -1228,34 +2975,36 @@ class FollowEngine(BaseEngine):
         Save symbol limit-up and limit-down price.
         """
         vt_symbol = tick.vt_symbol
-        if vt_symbol not in self.limited_prices:
-            d = {
-                'limit_up': tick.limit_up,
-                'limit_down': tick.limit_down
-            }
-            self.limited_prices[vt_symbol] = d
+        if vt_symbol not in self.symbol_prices:
+            symbol_price = self.warm_symbol_prices.pop(vt_symbol, None)
+            if symbol_price:
+                symbol_price.limit_up = tick.limit_up
+                symbol_price.limit_down = tick.limit_down
+            else:
+                contract = self.main_engine.get_contract(vt_symbol)
+                pricetick = contract.pricetick if contract else 0
+                symbol_price = SymbolPrice(pricetick, tick.limit_up, tick.limit_down)
+            self.symbol_prices[vt_symbol] = symbol_price
 
     def update_latest_price(self, tick: TickData):
         """
         Update symbol bid-1 price and ask-1 price.
         """
-        vt_symbol = tick.vt_symbol
-        if self.latest_prices.get(vt_symbol, None) is None:
-            self.latest_prices[vt_symbol] = {}
-        self.latest_prices[vt_symbol]['bid_price'] = tick.bid_price_1
-        self.latest_prices[vt_symbol]['ask_price'] = tick.ask_price_1
+        self.init_limited_price(tick)
+        self.symbol_prices[tick.vt_symbol].update_tick(tick)
 
     def is_timeout_trade(self, trade: Union[TradeData, OrderData]):
         """
         If trade happened a specified period of time before now, it usually happened if take a long time to reconnect.
         Because trade is not in self.vt_tradeids(if app don't restart). so it can't be filtered by self.vt_tradeids
         """
+        # 只比较当天的秒数，与成交时间是否带时区无关
         now = self.get_current_time()
-        trade_time = datetime.strptime(self.get_trade_time(trade), '%H:%M:%S')
-        trade_time = trade_time.replace(year=now.year, month=now.month, day=now.day)
+        now_seconds = now.hour * 3600 + now.minute * 60 + now.second
+        trade_seconds = self.get_trade_seconds(trade)
 
-        prefix_str = "成交单" if isinstance(trade, TradeData) else "委托单"
-        if now - trade_time > timedelta(seconds=self.filter_trade_timeout):
+        if now_seconds - trade_seconds > self.filter_trade_timeout:
+            prefix_str = "成交单" if isinstance(trade, TradeData) else "委托单"
             self.write_log(f"{prefix_str}{trade.vt_tradeid} 时间：{self.get_trade_time(trade)} 超过跟单有效期。")
             return True
         else:
@@ -1304,12 +3053,12 @@ class FollowEngine(BaseEngine):
             if order.volume in self.order_volumes_to_follow:
                 return True
             else:
-                self.write_log(f"委托单{order.vt_orderid}手数{order.volume}不符合跟单规则。")
+                self.write_log(f"委托单{order.vt_orderid}手数{order.volume}不符合跟单规则。", INFO, "volume_rule")
                 return False
         else:
             return True
 
-    def filter_source_trade(self, trade: TradeData):
+    def filter_source_trade(self, trade: TradeData, is_check_skip: bool = True):
         """
         Filter trade from source gateway.
         """
@@ -1318,7 +3067,7 @@ class FollowEngine(BaseEngine):
             return
 
         # 过滤黑名单合约
-        if self.is_skip_contract_trade(trade):
+        if is_check_skip and self.is_skip_contract_trade(trade):
             return
 
         # 过滤已成交
@@ -1354,10 +3103,9 @@ class FollowEngine(BaseEngine):
         if vt_orderid in self.chase_orderids:
             return True
 
-        for sub_list in self.tradeid_orderids_dict.values():
-            for orderid in sub_list:
-                if vt_orderid == orderid:
-                    return True
+        # 反向索引与tradeid_orderids_dict同步维护，避免每次回报遍历全部跟随单
+        if vt_orderid in self.orderid_to_signal_orderid:
+            return True
 
         if vt_orderid in self.fail_chase_orderid:
             return True
@@ -1404,42 +3152,32 @@ class FollowEngine(BaseEngine):
             tick_add = self.must_done_tick_add if is_must_done else self.tick_add
 
         # 只有当self.is_price_inited()市场数据初始化完成才会直接运行这个函数.
-        limit_price = self.limited_prices.get(vt_symbol)
-        latest_prices = self.latest_prices.get(vt_symbol)
-        ask_price, bid_price = latest_prices['ask_price'], latest_prices['bid_price']
-
-        # 涨跌停的时候不能直接用latest_prices，需要做处理，有些版本涨跌停数据是显示天文数字
-        if ask_price == 0:
-            ask_price = limit_price['limit_up']
-        else:
-            # 处理旧版本的涨停
-            ask_price = min(latest_prices['ask_price'], limit_price['limit_up'])
+        symbol_price = self.symbol_prices[vt_symbol]
+        if not symbol_price.pricetick:
+            symbol_price.pricetick = self.main_engine.get_contract(vt_symbol).pricetick
 
-        if bid_price == 0:
-            bid_price = limit_price['limit_down']
-        else:
-            if latest_prices['bid_price'] > limit_price['limit_up']:
-                bid_price = limit_price['limit_down']
-            else:
-                bid_price = latest_prices['bid_price']
+        if self.log_level <= DEBUG:
+            self.write_log(
+                f"{vt_symbol} ask: {symbol_price.ask_price} bid: {symbol_price.bid_price} price: {price}",
+                DEBUG,
+                "order_price"
+            )
 
-        print('ask:', ask_price, 'bid:', bid_price, 'price:', price)
-        contract = self.main_engine.get_contract(vt_symbol)
         if direction == Direction.LONG:
             if not price:
-                price = ask_price if base_price == OrderBasePrice.GOOD_FOR_OTHER else bid_price
+                price = symbol_price.ask_price if base_price == OrderBasePrice.GOOD_FOR_OTHER else symbol_price.bid_price
             # 用price设置为-1来表示手动模式下的市价发单
             if self.order_type == OrderType.MARKET or price == -1:
-                price = limit_price['limit_up']
+                price = symbol_price.limit_up
             else:
-                price = min(limit_price['limit_up'], price + tick_add * contract.pricetick)
+                price = min(symbol_price.limit_up, price + tick_add * symbol_price.pricetick)
         else:
             if not price:
-                price = bid_price if base_price == OrderBasePrice.GOOD_FOR_OTHER else ask_price
+                price = symbol_price.bid_price if base_price == OrderBasePrice.GOOD_FOR_OTHER else symbol_price.ask_price
             if self.order_type == OrderType.MARKET or price == -1:
-                price = limit_price['limit_down']
+                price = symbol_price.limit_down
             else:
-                price = max(limit_price['limit_down'], price - tick_add * contract.pricetick)
+                price = max(symbol_price.limit_down, price - tick_add * symbol_price.pricetick)
 
         return price
 
@@ -1460,6 +3198,8 @@ class FollowEngine(BaseEngine):
         req.volume = req.volume * self.multiples
         if self.inverse_follow:
             req = self.inverse_req(req)
+
+        self.latency_stats.stamp(order.vt_orderid, "convert")
         return req
 
     def convert_trade_to_order_req(self, trade: TradeData, is_must_done: bool = False):
@@ -1486,6 +3226,7 @@ class FollowEngine(BaseEngine):
         )
         req_net_vol = self.get_req_net_vol(req) * self.multiples
         req.volume = req.volume * self.multiples
+        self.latency_stats.stamp(trade.vt_tradeid, "convert")
 
         if self.inverse_follow:
             req = self.inverse_req(req)
@@ -1507,7 +3248,7 @@ class FollowEngine(BaseEngine):
                     symbol_pos['lost_follow_net'] += req_net_vol
                     self.put_pos_delta_event(vt_symbol)
                     # It will not follow trade, so save data here
-                    self.save_follow_data()
+                    self.save_follow_data(vt_symbol=vt_symbol)
 
                     self.write_log(f"{vt_symbol}丢失净仓：{lost_folow_vol}, 平仓净仓：{req_net_vol}, 无需跟随日内平仓。")
                     return
@@ -1527,7 +3268,7 @@ class FollowEngine(BaseEngine):
         """
         Check if limited price and latest price ready.
         """
-        if self.limited_prices.get(vt_symbol, None) and self.latest_prices.get(vt_symbol, None):
+        if vt_symbol in self.symbol_prices:
             return True
         else:
             return False
@@ -1545,27 +3286,110 @@ class FollowEngine(BaseEngine):
             self.subscribe(req.vt_symbol)
             self.write_log(f"{req.vt_symbol}订阅请求已发送。")
 
-            # 把委托任务压入任务列表
-            self.due_out_req_list.append((vt_tradeid, req, is_must_done))
+            # 把委托任务按合约压入任务列表，收到该合约行情后发送
+            if self.due_out_req_dict.get(req.vt_symbol, None) is None:
+                self.due_out_req_dict[req.vt_symbol] = []
+            self.due_out_req_dict[req.vt_symbol].append((vt_tradeid, req, is_must_done))
+            self.latency_stats.stamp(vt_tradeid, "enqueue", req.vt_symbol, "queue")
+        elif self.is_direct_dispatch and not self.is_dispatching and self.is_in_event_thread():
+            # 已在事件引擎线程内，直接发单，省去一次事件队列排队
+            self.latency_stats.stamp(vt_tradeid, "enqueue", req.vt_symbol, "inline")
+            self.latency_stats.stamp(vt_tradeid, "dispatch")
+
+            self.is_dispatching = True
+            try:
+                self.send_and_record(req, vt_tradeid, is_must_done)
+            finally:
+                self.is_dispatching = False
         else:
             # 直接向事件引擎压入发单事件
+            self.latency_stats.stamp(vt_tradeid, "enqueue", req.vt_symbol, "direct")
             order_tuple = (req, vt_tradeid, is_must_done)
             self.put_follow_order_event(order_tuple)
 
-    def send_queue_order(self):
+    def is_in_event_thread(self):
+        """
+        Check if current thread is event engine thread, UI thread should still send order by event.
+        """
+        return get_ident() == self.event_thread_id
+
+    def fan_out_trade(self, trade: TradeData):
         """
-        Send order in queue after limited price is ready.
+        Convert source trade once and dispatch to all extra target gateways.
         """
-        if not self.due_out_req_list:
+        if not self.extra_targets:
+            return
+
+        if trade.offset == Offset.NONE or trade.direction == Direction.NET:
             return
 
-        for req_tuple in copy(self.due_out_req_list):
-            vt_tradeid, req, is_must_done = req_tuple
-            if not self.is_price_inited(req.vt_symbol):
+        base_req = OrderRequest(
+            symbol=trade.symbol,
+            exchange=trade.exchange,
+            direction=trade.direction,
+            type=OrderType.LIMIT,
+            volume=trade.volume,
+            price=trade.price,
+            offset=trade.offset,
+            reference=f"{APP_NAME}_TradeMod"
+        )
+        if self.inverse_follow:
+            base_req = self.inverse_req(base_req)
+
+        # 与主跟单户一致：非日内模式全部必成，日内模式含平今部分时必成
+        if not self.is_intraday_trading:
+            is_must_done = True
+        else:
+            is_must_done = any(d['is_must_done'] for d in self.split_trade_to_open_close(trade))
+
+        is_price_inited = self.is_price_inited(base_req.vt_symbol)
+        if is_price_inited:
+            base_req.price = self.convert_order_price(
+                base_req.vt_symbol, base_req.direction, base_req.price, is_must_done)
+        else:
+            self.subscribe(base_req.vt_symbol)
+
+        for target in self.extra_targets.values():
+            req = target.convert_req(base_req, trade.vt_tradeid)
+            if not req:
                 continue
 
+            if is_price_inited:
+                target.put_order(req, trade.vt_tradeid)
+            else:
+                if target.due_out_req_dict.get(req.vt_symbol, None) is None:
+                    target.due_out_req_dict[req.vt_symbol] = []
+                target.due_out_req_dict[req.vt_symbol].append((trade.vt_tradeid, req, is_must_done))
+
+    def send_target_queue_order(self, target: FollowTarget, vt_symbol: str):
+        """
+        Send order in extra target queue of vt_symbol after limited price is ready.
+        """
+        if not self.is_price_inited(vt_symbol):
+            return
+
+        req_list = target.due_out_req_dict.pop(vt_symbol, None)
+        if not req_list:
+            return
+
+        for vt_tradeid, req, is_must_done in req_list:
+            req.price = self.convert_order_price(vt_symbol, req.direction, req.price, is_must_done)
+            target.put_order(req, vt_tradeid)
+
+    def send_queue_order(self, vt_symbol: str):
+        """
+        Send order in queue of vt_symbol after limited price is ready.
+        """
+        if not self.is_price_inited(vt_symbol):
+            return
+
+        req_list = self.due_out_req_dict.pop(vt_symbol, None)
+        if not req_list:
+            return
+
+        for vt_tradeid, req, is_must_done in req_list:
+            self.latency_stats.stamp(vt_tradeid, "dispatch")
             self.send_and_record(req, vt_tradeid, is_must_done)
-            self.due_out_req_list.remove(req_tuple)
 
     def send_and_record(
         self,
@@ -1585,10 +3409,12 @@ class FollowEngine(BaseEngine):
         req.price = self.convert_order_price(req.vt_symbol, req.direction, req.price, is_must_done, base_price=price_base)
         vt_orderids = self.convert_and_send_orders(req, is_must_done)
         if vt_orderids:
+            self.latency_stats.on_sent(vt_tradeid, vt_orderids)
+
             orderids_list = self.get_follow_orderids(vt_tradeid)
             orderids_list.extend(vt_orderids)
 
-            for orderid in copy(orderids_list):
+            for orderid in vt_orderids:
                 self.orderid_to_signal_orderid[orderid] = vt_tradeid
                 # 把初始跟随单加入初始set，用来区分普通超时或追单超时
                 self.first_orderids.add(orderid)
@@ -1604,7 +3430,7 @@ class FollowEngine(BaseEngine):
                     self.intraday_orderids.update(vt_orderids)
 
             self.write_log(f"{order_prefix} {vt_tradeid}发单成功，委托号：{'  '.join(vt_orderids)}。")
-            self.save_follow_data()
+            self.save_follow_data(vt_tradeid=vt_tradeid)
 
         return vt_orderids
 
@@ -1807,6 +3633,128 @@ class FollowEngine(BaseEngine):
             if vt_symbol not in self.skip_contracts:
                 self.sync_pos(vt_symbol)
 
+    def reconcile_pos(self):
+        """
+        Sync pos delta automatically in batch. Only dirty symbols are recalculated.
+        """
+        if not self.reconcile_interval or not self.is_active:
+            return
+
+        now = self.get_monotonic_ms()
+        if now < self.next_reconcile_time:
+            return
+        self.next_reconcile_time = now + int(self.reconcile_interval * 1000)
+
+        self.update_reconcile_deltas(now)
+        if not self.reconcile_deltas:
+            return
+
+        busy_symbols = self.get_busy_symbols()
+        min_age = self.reconcile_min_age * 1000
+
+        sync_list = []
+        for vt_symbol, (long_pos_delta, short_pos_delta) in self.reconcile_deltas.items():
+            if vt_symbol in self.skip_contracts or vt_symbol in busy_symbols:
+                continue
+
+            # 日内模式只能手动同步净仓
+            if self.strip_digit(vt_symbol) in self.intraday_symbols:
+                continue
+
+            # 仓差刚出现时可能是跟单委托还在路上，等待一段时间再同步
+            if now - self.reconcile_since[vt_symbol] < min_age or not self.is_price_inited(vt_symbol):
+                continue
+
+            if long_pos_delta > 0:
+                sync_list.append((vt_symbol, self.buy, long_pos_delta))
+            elif long_pos_delta < 0:
+                sync_list.append((vt_symbol, self.sell, -long_pos_delta))
+
+            if short_pos_delta > 0:
+                sync_list.append((vt_symbol, self.short, short_pos_delta))
+            elif short_pos_delta < 0:
+                sync_list.append((vt_symbol, self.cover, -short_pos_delta))
+
+        if not sync_list:
+            return
+
+        sync_list = sync_list[:self.reconcile_max_orders]
+        for vt_symbol, func, volume in sync_list:
+            func(vt_symbol, volume)
+            self.reconcile_since[vt_symbol] = now
+
+        sync_symbols = sorted(set(d[0] for d in sync_list))
+        self.write_log(f"自动同步仓位，委托数：{len(sync_list)}，合约：{sync_symbols}", WARNING)
+
+    def update_reconcile_deltas(self, now: int):
+        """
+        Recalculate pos delta of dirty symbols.
+        """
+        for vt_symbol in self.reconcile_dirty_symbols:
+            if vt_symbol not in self.positions:
+                self.reconcile_deltas.pop(vt_symbol, None)
+                self.reconcile_since.pop(vt_symbol, None)
+                continue
+
+            pos_delta = self.get_reconcile_delta(vt_symbol)
+            if pos_delta == (0, 0):
+                self.reconcile_deltas.pop(vt_symbol, None)
+                self.reconcile_since.pop(vt_symbol, None)
+            elif self.reconcile_deltas.get(vt_symbol, None) != pos_delta:
+                self.reconcile_deltas[vt_symbol] = pos_delta
+                self.reconcile_since[vt_symbol] = now
+        self.reconcile_dirty_symbols.clear()
+
+    def add_unfollowed_trade(self, trade: TradeData):
+        """
+        Record pos delta of source trade not followed on purpose, which is excluded from reconcile.
+        """
+        vt_symbol = trade.vt_symbol
+        symbol_pos = self.get_symbol_pos(vt_symbol)
+
+        volume = trade.volume * self.multiples
+        trade_type = self.get_trade_type(trade)
+        if trade_type in [TradeType.BUY, TradeType.SELL]:
+            side = "long" if not self.inverse_follow else "short"
+        else:
+            side = "short" if not self.inverse_follow else "long"
+        if trade_type in [TradeType.SELL, TradeType.COVER]:
+            volume = -volume
+
+        name = f"unfollowed_{side}"
+        symbol_pos[name] = symbol_pos.get(name, 0) + volume
+        self.reconcile_dirty_symbols.add(vt_symbol)
+        self.save_follow_data(vt_symbol=vt_symbol)
+
+    def get_reconcile_delta(self, vt_symbol: str):
+        """
+        Pos delta excluding volume not followed on purpose.
+        """
+        symbol_pos = self.positions[vt_symbol]
+        reconcile_delta = []
+        for name, delta in zip(["unfollowed_long", "unfollowed_short"], self.get_pos_delta(vt_symbol)):
+            # 未跟随仓差不超过同向的实际仓差，仓差缩小（源户平仓或手动同步）后随之减少
+            unfollowed = symbol_pos.get(name, 0)
+            if unfollowed > 0:
+                unfollowed = min(unfollowed, max(delta, 0))
+            elif unfollowed < 0:
+                unfollowed = max(unfollowed, min(delta, 0))
+
+            if name in symbol_pos:
+                symbol_pos[name] = unfollowed
+            reconcile_delta.append(delta - unfollowed)
+        return tuple(reconcile_delta)
+
+    def get_busy_symbols(self):
+        """
+        Symbols with active follow orders or queued requests in target gateway.
+        """
+        busy_symbols = set(self.due_out_req_dict.keys())
+        for order in self.main_engine.get_all_active_orders():
+            if order.gateway_name == self.target_gateway_name and self.filter_target_not_follow(order.vt_orderid):
+                busy_symbols.add(order.vt_symbol)
+        return busy_symbols
+
     def send_sync_order_req(
         self,
         vt_symbol: str,
@@ -1907,28 +3855,113 @@ class FollowEngine(BaseEngine):
 
     def put_pos_delta_event(self, vt_symbol: str):
         """
-        Calculate delta pos and put event
+        Mark symbol pos delta changed, event is put by flush_pos_delta at most once per interval.
         """
         pos_dict = self.positions.get(vt_symbol, None)
         if pos_dict:
             pos_dict['target_net'] = pos_dict['target_long'] - pos_dict['target_short']
-            pos_dict = copy(pos_dict)
-            pos_dict['vt_symbol'] = vt_symbol
-            pos_dict['long_delta'], pos_dict['short_delta'] = self.get_pos_delta(vt_symbol)
-            pos_dict['net_delta'] = self.get_net_pos_delta(vt_symbol)
-
-            pos_data = PosDeltaData()
-            pos_data.__dict__ = pos_dict
-            event = Event(EVENT_FOLLOW_POS_DELTA, pos_data)
-            self.event_engine.put(event)
+            self.reconcile_dirty_symbols.add(vt_symbol)
+
+            if not self.pos_delta_interval:
+                self.publish_pos_delta(vt_symbol)
+            elif vt_symbol in self.dirty_pos_symbols:
+                self.pos_delta_suppressed += 1
+            else:
+                self.dirty_pos_symbols.add(vt_symbol)
+
+    def flush_pos_delta(self, force: bool = False):
+        """
+        Put pos delta event of changed symbols at most once per interval, force to put immediately.
+        """
+        if not self.dirty_pos_symbols:
+            return
+
+        now = self.get_monotonic_ms()
+        if not force and now < self.next_pos_delta_flush:
+            return
+        self.next_pos_delta_flush = now + self.pos_delta_interval
+
+        for vt_symbol in self.dirty_pos_symbols:
+            self.publish_pos_delta(vt_symbol)
+        self.dirty_pos_symbols.clear()
+
+    def publish_pos_delta(self, vt_symbol: str):
+        """
+        Calculate delta pos and put event if it is different from last one.
+        """
+        pos_dict = self.positions.get(vt_symbol, None)
+        if not pos_dict:
+            return
+
+        pos_dict = copy(pos_dict)
+        pos_dict['vt_symbol'] = vt_symbol
+        pos_dict['long_delta'], pos_dict['short_delta'] = self.get_pos_delta(vt_symbol)
+        pos_dict['net_delta'] = self.get_net_pos_delta(vt_symbol)
+
+        if self.last_pos_deltas.get(vt_symbol, None) == pos_dict:
+            self.pos_delta_suppressed += 1
+            return
+        self.last_pos_deltas[vt_symbol] = pos_dict
+
+        pos_data = PosDeltaData()
+        pos_data.__dict__ = copy(pos_dict)
+        event = Event(EVENT_FOLLOW_POS_DELTA, pos_data)
+        self.event_engine.put(event)
+
+    def get_pos_delta_suppressed(self):
+        """
+        Get count of pos delta updates merged or dropped as unchanged.
+        """
+        return self.pos_delta_suppressed
+
+    def get_latency_summary(self, by_symbol: bool = True):
+        """
+        Get follow latency statistics in milliseconds.
+        """
+        return self.latency_stats.get_summary(by_symbol)
+
+    def log_latency_summary(self):
+        """
+        Write latency summary of each path regularly.
+        """
+        if not self.latency_log_interval:
+            return
+
+        if self.latency_log_count >= self.latency_log_interval:
+            self.latency_log_count = 0
+
+            summary = self.get_latency_summary(by_symbol=False)
+            if summary:
+                items = []
+                for (path, segment), d in sorted(summary.items()):
+                    items.append(f"{path}/{segment} n={d['count']} p50={d['p50']:.2f} p99={d['p99']:.2f} max={d['max']:.2f}")
+                self.write_log(f"跟单延迟统计(ms)：{'; '.join(items)}")
+        self.latency_log_count += 1
 
     def put_follow_order_event(self, order_tuple: tuple):
         """"""
         event = Event(EVENT_FOLLOW_ORDER, order_tuple)
         self.event_engine.put(event)
 
-    def write_log(self, msg: str):
-        """"""
-        log = LogData(msg=msg, gateway_name=APP_NAME)
-        event = Event(EVENT_FOLLOW_LOG, log)
-        self.event_engine.put(event)
+    def write_log(self, msg: str, level: int = INFO, key: str = ""):
+        """
+        Write log to file by logger thread, only put event if level is not lower than log_event_level.
+        Messages with key are sampled and rate limited.
+        """
+        logger = self.logger
+        if level < logger.level:
+            return
+
+        if key:
+            allowed, suppressed = logger.is_allowed(key)
+            if suppressed:
+                self.write_log(f"日志[{key}]上一秒限流丢弃{suppressed}条。", level)
+            if not allowed:
+                return
+
+        logger.write(level, msg)
+
+        if level >= logger.event_level:
+            log = LogData(msg=msg, gateway_name=APP_NAME, level=level)
+            event = Event(EVENT_FOLLOW_LOG, log)
+            self.event_engine.put(event)
@@ -0,0 +1,617 @@
+"""
+Deterministic replay harness for FollowEngine.
+
+Source order/trade/tick streams are fed into a FollowEngine running on stub
+main engine and event engine, while target orders are matched by a local
+simulator against the replayed book. Time is simulated, so replay runs
+faster than real time.
+"""
+import random
+from copy import copy
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+from vnpy.event import Event
+from vnpy.trader.constant import Direction, Exchange, Offset, OrderType, Product, Status
+from vnpy.trader.event import EVENT_ORDER, EVENT_TICK, EVENT_TIMER, EVENT_TRADE
+from vnpy.trader.object import (
+    CancelRequest,
+    ContractData,
+    OrderData,
+    OrderRequest,
+    SubscribeRequest,
+    TickData,
+    TradeData
+)
+
+from .engine import EVENT_FOLLOW_ORDER, EVENT_FOLLOW_TIMER, FollowEngine
+
+
+class ReplayEventEngine:
+    """
+    Synchronous event engine, events are processed in the caller thread.
+    """
+
+    def __init__(self):
+        """"""
+        self._handlers = {}
+        self._queue = []
+        self.event_count = 0
+        self.max_queue_depth = {}       # type: max events queued ahead
+
+    def register(self, type: str, handler):
+        """"""
+        handler_list = self._handlers.setdefault(type, [])
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+    def unregister(self, type: str, handler):
+        """"""
+        handler_list = self._handlers.get(type, [])
+        if handler in handler_list:
+            handler_list.remove(handler)
+
+    def put(self, event: Event):
+        """"""
+        depth = len(self._queue)
+        if depth > self.max_queue_depth.get(event.type, 0):
+            self.max_queue_depth[event.type] = depth
+        self._queue.append(event)
+
+    def process(self):
+        """
+        Process all events in queue, including events put by handlers.
+        """
+        while self._queue:
+            event = self._queue.pop(0)
+            self.event_count += 1
+            for handler in self._handlers.get(event.type, []):
+                handler(event)
+
+
+class SimTargetGateway:
+    """
+    Local matching simulator of target gateway.
+    Limit order is filled against best bid/ask of replayed tick, partially filled if book volume is not enough.
+    """
+
+    def __init__(self, main_engine: "ReplayMainEngine", gateway_name: str, reject_rate: float = 0, seed: int = 0):
+        """"""
+        self.main_engine = main_engine
+        self.event_engine = main_engine.event_engine
+        self.gateway_name = gateway_name
+        self.reject_rate = reject_rate
+        self.random = random.Random(seed)
+
+        self.order_count = 0
+        self.trade_count = 0
+        self.reject_count = 0
+        self.active_orders: Dict[str, OrderData] = {}
+
+    def send_order(self, req: OrderRequest):
+        """"""
+        self.order_count += 1
+        order = req.create_order_data(str(self.order_count), self.gateway_name)
+        order.datetime = self.main_engine.now
+
+        tick = self.main_engine.ticks.get(req.vt_symbol, None)
+        if (
+            not tick
+            or req.price > tick.limit_up
+            or req.price < tick.limit_down
+            or self.random.random() < self.reject_rate
+        ):
+            order.status = Status.REJECTED
+            self.reject_count += 1
+            self.on_order(order)
+            return order.vt_orderid
+
+        order.status = Status.NOTTRADED
+        self.active_orders[order.vt_orderid] = order
+        self.on_order(order)
+        self.match_order(order, tick)
+        return order.vt_orderid
+
+    def cancel_order(self, req: CancelRequest):
+        """"""
+        vt_orderid = f"{self.gateway_name}.{req.orderid}"
+        order = self.active_orders.pop(vt_orderid, None)
+        if not order:
+            return
+
+        order.status = Status.CANCELLED
+        self.on_order(order)
+
+    def on_tick(self, tick: TickData):
+        """"""
+        for order in list(self.active_orders.values()):
+            if order.vt_symbol == tick.vt_symbol:
+                self.match_order(order, tick)
+
+    def match_order(self, order: OrderData, tick: TickData):
+        """"""
+        if order.direction == Direction.LONG:
+            if not tick.ask_price_1 or order.price < tick.ask_price_1:
+                return
+            price = tick.ask_price_1
+            book_volume = tick.ask_volume_1
+        else:
+            if not tick.bid_price_1 or order.price > tick.bid_price_1:
+                return
+            price = tick.bid_price_1
+            book_volume = tick.bid_volume_1
+
+        remaining = order.volume - order.traded
+        volume = min(remaining, book_volume) if book_volume else remaining
+
+        self.trade_count += 1
+        trade = TradeData(
+            symbol=order.symbol,
+            exchange=order.exchange,
+            orderid=order.orderid,
+            tradeid=str(self.trade_count),
+            direction=order.direction,
+            offset=order.offset,
+            price=price,
+            volume=volume,
+            datetime=self.main_engine.now,
+            gateway_name=self.gateway_name
+        )
+
+        order.traded += volume
+        if order.traded >= order.volume:
+            order.status = Status.ALLTRADED
+            self.active_orders.pop(order.vt_orderid, None)
+        else:
+            order.status = Status.PARTTRADED
+
+        self.on_order(order)
+        self.main_engine.on_trade(trade)
+
+    def on_order(self, order: OrderData):
+        """"""
+        self.main_engine.on_order(copy(order))
+
+
+class ReplayMainEngine:
+    """
+    Stub main engine holding replayed data, target orders are routed to SimTargetGateway.
+    """
+
+    def __init__(self, event_engine: ReplayEventEngine, target_gateway_name: str, reject_rate: float = 0, seed: int = 0):
+        """"""
+        self.event_engine = event_engine
+        self.now: datetime = None
+
+        self.contracts: Dict[str, ContractData] = {}
+        self.ticks: Dict[str, TickData] = {}
+        self.orders: Dict[str, OrderData] = {}
+        self.trades: Dict[str, TradeData] = {}
+
+        self.target_gateway = SimTargetGateway(self, target_gateway_name, reject_rate, seed)
+
+    def add_contract(self, contract: ContractData):
+        """"""
+        self.contracts[contract.vt_symbol] = contract
+
+    def on_tick(self, tick: TickData):
+        """"""
+        self.ticks[tick.vt_symbol] = tick
+        self.event_engine.put(Event(EVENT_TICK, tick))
+        self.target_gateway.on_tick(tick)
+
+    def on_order(self, order: OrderData):
+        """"""
+        self.orders[order.vt_orderid] = order
+        self.event_engine.put(Event(EVENT_ORDER, order))
+
+    def on_trade(self, trade: TradeData):
+        """"""
+        self.trades[trade.vt_tradeid] = trade
+        self.event_engine.put(Event(EVENT_TRADE, trade))
+
+    def get_contract(self, vt_symbol: str):
+        """"""
+        return self.contracts.get(vt_symbol, None)
+
+    def get_order(self, vt_orderid: str):
+        """"""
+        return self.orders.get(vt_orderid, None)
+
+    def get_trade(self, vt_tradeid: str):
+        """"""
+        return self.trades.get(vt_tradeid, None)
+
+    def get_all_contracts(self):
+        """"""
+        return list(self.contracts.values())
+
+    def get_all_trades(self):
+        """"""
+        return list(self.trades.values())
+
+    def get_all_accounts(self):
+        """"""
+        return []
+
+    def get_all_positions(self):
+        """
+        Positions of replay are rebuilt from trades, none is pushed at start.
+        """
+        return []
+
+    def get_all_active_orders(self, vt_symbol: str = ""):
+        """"""
+        return [
+            order for order in self.orders.values()
+            if order.is_active() and (not vt_symbol or order.vt_symbol == vt_symbol)
+        ]
+
+    def subscribe(self, req: SubscribeRequest, gateway_name: str):
+        """
+        Market data comes from replayed ticks.
+        """
+        pass
+
+    def send_order(self, req: OrderRequest, gateway_name: str):
+        """"""
+        if gateway_name != self.target_gateway.gateway_name:
+            return ""
+        return self.target_gateway.send_order(req)
+
+    def cancel_order(self, req: CancelRequest, gateway_name: str):
+        """"""
+        if gateway_name == self.target_gateway.gateway_name:
+            self.target_gateway.cancel_order(req)
+
+
+class ReplayFollowEngine(FollowEngine):
+    """
+    FollowEngine with settings in memory, simulated clock and no file output.
+    """
+
+    def __init__(self, main_engine: ReplayMainEngine, event_engine: ReplayEventEngine, setting: dict):
+        """"""
+        self.replay_setting = setting
+        super().__init__(main_engine, event_engine)
+
+    def load_data(self):
+        """"""
+        self.follow_setting = dict(self.replay_setting)
+        self.apply_follow_setting(self.follow_setting)
+
+        # 回放只跟随主跟单户，保证结果可复现
+        self.extra_target_settings = []
+        self.is_log_to_file = False
+        self.is_dedup_persist = False
+        self.is_warm_start = False
+
+    def get_current_time(self):
+        """"""
+        return self.main_engine.now
+
+    def get_monotonic_ms(self):
+        """"""
+        return int(self.main_engine.now.timestamp() * 1000)
+
+    def start_order_timer(self):
+        """
+        Timer event is driven by replay clock.
+        """
+        pass
+
+    def view_vars(self):
+        """"""
+        pass
+
+    def save_follow_setting(self):
+        """"""
+        pass
+
+    def save_follow_data(self, vt_symbol: str = "", vt_tradeid: str = ""):
+        """"""
+        pass
+
+    def clear_follow_data(self):
+        """"""
+        pass
+
+    def save_trade(self):
+        """"""
+        pass
+
+    def archive_trade(self, trade: TradeData):
+        """"""
+        pass
+
+    def save_account_info(self):
+        """"""
+        pass
+
+
+@dataclass
+class ReplayResult:
+    """"""
+    event_count: int = 0
+    source_trade_count: int = 0
+    target_order_count: int = 0
+    target_trade_count: int = 0
+    reject_count: int = 0
+    chase_count: int = 0
+    wall_time: float = 0
+    events_per_second: float = 0
+    replay_seconds: float = 0
+    net_delta_series: List[Tuple[datetime, str, int]] = field(default_factory=list)
+    final_net_delta: Dict[str, int] = field(default_factory=dict)
+    max_abs_net_delta: int = 0
+    slippage_list: List[Tuple[str, float]] = field(default_factory=list)     # (vt_symbol, slippage ticks)
+    average_slippage: float = 0
+    follow_order_queue_depth: int = 0       # max events queued ahead of follow order event
+    latency_summary: dict = field(default_factory=dict)     # LatencyStats.get_summary(by_symbol=False)
+
+    def __str__(self):
+        """"""
+        return "\n".join([
+            f"事件数：{self.event_count}，处理速度：{self.events_per_second:.0f}事件/秒",
+            f"回放时长：{self.replay_seconds:.0f}秒，实际耗时：{self.wall_time:.3f}秒",
+            f"源户成交：{self.source_trade_count}，目标户委托：{self.target_order_count}，"
+            f"目标户成交：{self.target_trade_count}，拒单：{self.reject_count}，追单：{self.chase_count}",
+            f"平均滑点（跳）：{self.average_slippage:.2f}，最大净仓差：{self.max_abs_net_delta}",
+            f"最终净仓差：{self.final_net_delta}",
+        ])
+
+
+class FollowReplay:
+    """
+    Replay source events into FollowEngine and report follow accuracy, slippage, chase count and throughput.
+    """
+
+    def __init__(
+        self,
+        setting: dict,
+        contracts: List[ContractData],
+        source_gateway_name: str = "SOURCE",
+        target_gateway_name: str = "TARGET",
+        reject_rate: float = 0,
+        seed: int = 0
+    ):
+        """"""
+        setting = dict(setting)
+        setting["source_gateway_name"] = source_gateway_name
+        setting["target_gateway_name"] = target_gateway_name
+
+        self.event_engine = ReplayEventEngine()
+        self.main_engine = ReplayMainEngine(self.event_engine, target_gateway_name, reject_rate, seed)
+        for contract in contracts:
+            self.main_engine.add_contract(contract)
+
+        self.source_gateway_name = source_gateway_name
+        self.follow_engine: ReplayFollowEngine = None
+        self.setting = setting
+
+        self.timer_interval = timedelta(seconds=1)
+        self.follow_timer_interval = timedelta(seconds=setting.get("order_timer_interval", 0.1))
+
+    def run(self, events: List[Tuple[datetime, object]], batch_size: int = 1):
+        """
+        Replay events sorted by datetime. Event data can be TickData, OrderData or TradeData of source gateway.
+
+        Event queue is processed every batch_size events, larger batch simulates burst of market data.
+        """
+        if not events:
+            return ReplayResult()
+
+        self.main_engine.now = events[0][0]
+        self.follow_engine = ReplayFollowEngine(self.main_engine, self.event_engine, self.setting)
+        self.follow_engine.init_engine()
+        self.follow_engine.start()
+
+        result = ReplayResult()
+        source_prices = {}
+        last_net_delta = {}
+
+        next_timer = self.main_engine.now + self.timer_interval
+        next_follow_timer = self.main_engine.now + self.follow_timer_interval
+
+        start = perf_counter()
+        for n, (dt, data) in enumerate(events, 1):
+            # 推进模拟时钟，依次触发定时事件
+            while min(next_timer, next_follow_timer) <= dt:
+                if next_follow_timer <= next_timer:
+                    self.main_engine.now = next_follow_timer
+                    self.event_engine.put(Event(EVENT_FOLLOW_TIMER))
+                    next_follow_timer += self.follow_timer_interval
+                else:
+                    self.main_engine.now = next_timer
+                    self.event_engine.put(Event(EVENT_TIMER))
+                    next_timer += self.timer_interval
+                if batch_size == 1:
+                    self.event_engine.process()
+
+            self.main_engine.now = dt
+            if isinstance(data, TickData):
+                self.main_engine.on_tick(data)
+            elif isinstance(data, OrderData):
+                self.main_engine.on_order(data)
+            elif isinstance(data, TradeData):
+                source_prices[data.vt_tradeid] = data.price
+                result.source_trade_count += 1
+                self.main_engine.on_trade(data)
+
+            if n % batch_size and n < len(events):
+                continue
+            self.event_engine.process()
+
+            self.record_net_delta(result, last_net_delta)
+
+        result.wall_time = perf_counter() - start
+        self.follow_engine.stop()
+
+        self.calculate_result(result, source_prices, events)
+        return result
+
+    def record_net_delta(self, result: ReplayResult, last_net_delta: dict):
+        """"""
+        for vt_symbol in self.follow_engine.positions:
+            net_delta = self.follow_engine.get_net_pos_delta(vt_symbol)
+            if last_net_delta.get(vt_symbol, None) != net_delta:
+                last_net_delta[vt_symbol] = net_delta
+                result.net_delta_series.append((self.main_engine.now, vt_symbol, net_delta))
+
+    def calculate_result(self, result: ReplayResult, source_prices: dict, events: list):
+        """"""
+        engine = self.follow_engine
+        gateway = self.main_engine.target_gateway
+
+        result.event_count = self.event_engine.event_count
+        result.events_per_second = result.event_count / result.wall_time if result.wall_time else 0
+        result.replay_seconds = (events[-1][0] - events[0][0]).total_seconds()
+        result.target_order_count = gateway.order_count
+        result.target_trade_count = gateway.trade_count
+        result.reject_count = gateway.reject_count
+        result.chase_count = sum(engine.chase_resend_count_dict.values())
+        result.follow_order_queue_depth = self.event_engine.max_queue_depth.get(EVENT_FOLLOW_ORDER, 0)
+        result.latency_summary = engine.latency_stats.get_summary(by_symbol=False)
+
+        for vt_symbol in engine.positions:
+            result.final_net_delta[vt_symbol] = engine.get_net_pos_delta(vt_symbol)
+        if result.net_delta_series:
+            result.max_abs_net_delta = max(abs(net_delta) for _, _, net_delta in result.net_delta_series)
+
+        # 目标户成交价与信号成交价之差，以跳数计，正数为不利滑点
+        for trade in self.main_engine.trades.values():
+            if trade.gateway_name != gateway.gateway_name:
+                continue
+
+            vt_orderid = engine.chase_ancestor_dict.get(trade.vt_orderid, trade.vt_orderid)
+            signal_id = engine.orderid_to_signal_orderid.get(vt_orderid, "")
+            source_price = source_prices.get(signal_id, None)
+            if source_price is None:
+                continue
+
+            contract = self.main_engine.get_contract(trade.vt_symbol)
+            diff = trade.price - source_price
+            if trade.direction == Direction.SHORT:
+                diff = -diff
+            if engine.inverse_follow:
+                diff = -diff
+            result.slippage_list.append((trade.vt_symbol, diff / contract.pricetick))
+
+        if result.slippage_list:
+            result.average_slippage = sum(s for _, s in result.slippage_list) / len(result.slippage_list)
+
+
+def generate_events(
+    contract: ContractData,
+    start: datetime,
+    tick_count: int = 10000,
+    trade_probability: float = 0.02,
+    source_gateway_name: str = "SOURCE",
+    seed: int = 0
+):
+    """
+    Generate random walk ticks and source orders/trades for replay.
+    """
+    rng = random.Random(seed)
+    pricetick = contract.pricetick
+    price = 1000 * pricetick
+    limit_up = price * 1.1
+    limit_down = price * 0.9
+
+    events = []
+    dt = start
+    pos = 0
+    order_count = 0
+
+    for _ in range(tick_count):
+        dt += timedelta(milliseconds=500)
+        price = min(max(price + rng.choice([-1, 0, 0, 1]) * pricetick, limit_down + pricetick), limit_up - pricetick)
+
+        tick = TickData(
+            symbol=contract.symbol,
+            exchange=contract.exchange,
+            datetime=dt,
+            last_price=price,
+            limit_up=limit_up,
+            limit_down=limit_down,
+            bid_price_1=price - pricetick,
+            ask_price_1=price,
+            bid_volume_1=rng.randint(1, 20),
+            ask_volume_1=rng.randint(1, 20),
+            gateway_name=source_gateway_name
+        )
+        events.append((dt, tick))
+
+        if rng.random() >= trade_probability:
+            continue
+
+        # 源户成交，有仓位时一半概率平仓
+        volume = rng.choice([1, 2])
+        if pos and rng.random() < 0.5:
+            direction = Direction.SHORT if pos > 0 else Direction.LONG
+            offset = Offset.CLOSE
+            volume = min(volume, abs(pos))
+        else:
+            direction = rng.choice([Direction.LONG, Direction.SHORT])
+            offset = Offset.OPEN
+        pos += volume if direction == Direction.LONG else -volume
+
+        order_count += 1
+        trade_dt = dt + timedelta(milliseconds=100)
+        trade_price = tick.ask_price_1 if direction == Direction.LONG else tick.bid_price_1
+        order = OrderData(
+            symbol=contract.symbol,
+            exchange=contract.exchange,
+            orderid=str(order_count),
+            type=OrderType.LIMIT,
+            direction=direction,
+            offset=offset,
+            price=trade_price,
+            volume=volume,
+            traded=volume,
+            status=Status.ALLTRADED,
+            datetime=trade_dt,
+            gateway_name=source_gateway_name
+        )
+        trade = TradeData(
+            symbol=contract.symbol,
+            exchange=contract.exchange,
+            orderid=str(order_count),
+            tradeid=str(order_count),
+            direction=direction,
+            offset=offset,
+            price=trade_price,
+            volume=volume,
+            datetime=trade_dt,
+            gateway_name=source_gateway_name
+        )
+        events.append((trade_dt, order))
+        events.append((trade_dt, trade))
+
+    return events
+
+
+if __name__ == "__main__":
+    contract = ContractData(
+        symbol="rb2410",
+        exchange=Exchange.SHFE,
+        name="螺纹钢2410",
+        product=Product.FUTURES,
+        size=10,
+        pricetick=1,
+        gateway_name="SOURCE"
+    )
+    setting = {
+        "is_chase_order": True,
+        "cancel_order_timeout": 2,
+        "chase_order_timeout": 1,
+        "tick_add": 0,
+        "must_done_tick_add": 0,
+        "latency_log_interval": 0
+    }
+    events = generate_events(contract, datetime.now().replace(hour=9, minute=0, second=0, microsecond=0))
+
+    replay = FollowReplay(setting, [contract], reject_rate=0.01)
+    print(replay.run(events))
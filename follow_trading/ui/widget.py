@@ -688,8 +688,9 @@ class OrderSettingEditor(QtWidgets.QDialog):
         self.keep_order_after_chase_combo.currentTextChanged[str].connect(self.set_keep_order_after_chase)
 
         validator = QtGui.QIntValidator()
+        double_validator = QtGui.QDoubleValidator()
         self.chase_timeout_line = QtWidgets.QLineEdit(str(self.follow_engine.chase_order_timeout))
-        self.chase_timeout_line.setValidator(validator)
+        self.chase_timeout_line.setValidator(double_validator)
         self.chase_timeout_line.editingFinished.connect(self.set_chase_order_timeout)
 
         self.chase_tickadd_line = QtWidgets.QLineEdit(str(self.follow_engine.chase_order_tick_add))
@@ -701,7 +702,7 @@ class OrderSettingEditor(QtWidgets.QDialog):
         self.chase_resend_line.editingFinished.connect(self.set_chase_max_resend)
 
         self.timeout_line = QtWidgets.QLineEdit(str(self.follow_engine.cancel_order_timeout))
-        self.timeout_line.setValidator(validator)
+        self.timeout_line.setValidator(double_validator)
         self.timeout_line.editingFinished.connect(self.set_cancel_order_timeout)
 
         self.tickout_line = QtWidgets.QLineEdit(str(self.follow_engine.tick_add))
@@ -861,7 +862,7 @@ class OrderSettingEditor(QtWidgets.QDialog):
     def set_chase_order_timeout(self):
         """"""
         text = self.chase_timeout_line.text()
-        self.follow_engine.set_parameters('chase_order_timeout', int(text))
+        self.follow_engine.set_parameters('chase_order_timeout', float(text))
         self.write_log(f"追价超时自动撤单：{self.follow_engine.chase_order_timeout} 秒设置成功")
 
     def set_chase_order_tickadd(self):
@@ -879,7 +880,7 @@ class OrderSettingEditor(QtWidgets.QDialog):
     def set_cancel_order_timeout(self):
         """"""
         text = self.timeout_line.text()
-        self.follow_engine.set_parameters('cancel_order_timeout', int(text))
+        self.follow_engine.set_parameters('cancel_order_timeout', float(text))
         self.write_log(f"未成交自动撤单超时：{self.follow_engine.cancel_order_timeout} 秒设置成功")
 
     def set_tick_add(self):
@@ -4,6 +4,13 @@ from typing import Optional, Dict, List, Set, Callable, Tuple, Any
 from copy import copy
 from enum import Enum
 from datetime import datetime
+from time import perf_counter, monotonic
+from threading import Thread
+from queue import Queue, Empty
+
+import numpy as np
+from scipy.special import ndtr
+from scipy.optimize import brentq
 
 from vnpy.event import Event, EventEngine
 from vnpy.trader.event import (
@@ -29,6 +36,7 @@ APP_NAME = "OptionMasterExt"
 EVENT_OPTION_STRATEGY_ORDER = "eOptionStrategyOrder"
 EVENT_OPTION_HEDGE_ALGO_STATUS = "eOptionHedgeAlgoStatus"
 EVENT_OPTION_HEDGE_ALGO_LOG = "eOptionHedgeAlgoLog"
+EVENT_OPTION_HEDGE_CALC_RESULT = "eOptionHedgeCalcResult"
 
 STRATEGY_HEDGE_DELTA_LONG = "hedge_delta_long"
 STRATEGY_HEDGE_DELTA_SHORT = "hedge_delta_short"
@@ -43,6 +51,73 @@ STRATEGY_STRANGLE_LONG_THREE = "strangle_long_3"
 STRATEGY_STRANGLE_SHORT_THREE = "strangle_short_3"
 
 
+# pricing models with closed-form delta, evaluated over arrays
+VECTOR_PRICING_MODELS = ["black_76", "black_scholes"]
+
+
+def get_vector_pricing_model(option: OptionData) -> str:
+    """
+    Get vectorizable pricing model name of option, empty if not supported.
+    """
+    module_name = getattr(option.calculate_greeks, "__module__", "") or ""
+    for model_name in VECTOR_PRICING_MODELS:
+        if model_name in module_name:
+            return model_name
+    return ""
+
+
+def calculate_chain_deltas(prices: np.ndarray, arrays: Dict[str, Any]) -> np.ndarray:
+    """
+    Calculate chain pos delta for every price in one broadcasted call.
+    Same formula as vnpy pricing models: delta * s * 0.01 * size * net_pos.
+    """
+    s = np.asarray(prices, dtype=float)[:, np.newaxis]
+    k = arrays["strike"]
+    r = arrays["interest_rate"]
+    t = arrays["time_to_expiry"]
+    v = arrays["impv"]
+    cp = arrays["option_type"]
+
+    v_sqrt_t = v * np.sqrt(t)
+    if arrays["model"] == "black_76":
+        d1 = (np.log(s / k) + 0.5 * v * v * t) / v_sqrt_t
+        delta = cp * np.exp(-r * t) * ndtr(cp * d1) * s * 0.01
+    else:
+        d1 = (np.log(s / k) + (r + 0.5 * v * v) * t) / v_sqrt_t
+        delta = cp * ndtr(cp * d1) * s * 0.01
+
+    return (delta * arrays["pos"]).sum(axis=1)
+
+
+def calculate_chain_delta_slope(price: float, arrays: Dict[str, Any]) -> Tuple[float, float]:
+    """
+    Calculate chain pos delta and its derivative by underlying price at one price.
+    Derivative comes from analytic gamma: d(delta * s * 0.01)/ds = 0.01 * (delta + s * gamma).
+    """
+    s = price
+    k = arrays["strike"]
+    r = arrays["interest_rate"]
+    t = arrays["time_to_expiry"]
+    v = arrays["impv"]
+    cp = arrays["option_type"]
+
+    v_sqrt_t = v * np.sqrt(t)
+    if arrays["model"] == "black_76":
+        d1 = (np.log(s / k) + 0.5 * v * v * t) / v_sqrt_t
+        discount = np.exp(-r * t)
+    else:
+        d1 = (np.log(s / k) + (r + 0.5 * v * v) * t) / v_sqrt_t
+        discount = 1
+
+    _delta = cp * discount * ndtr(cp * d1)
+    _gamma = discount * np.exp(-0.5 * d1 * d1) / np.sqrt(2 * np.pi) / (s * v_sqrt_t)
+
+    pos = arrays["pos"]
+    chain_delta = (_delta * s * 0.01 * pos).sum()
+    chain_slope = ((_delta + s * _gamma) * 0.01 * pos).sum()
+    return float(chain_delta), float(chain_slope)
+
+
 class OptionStrategy(Enum):
     CALL = "认购"
     PUT = "认沽"
@@ -218,10 +293,20 @@ class OptionEngineExt(OptionEngine):
 
         if isinstance(instrument, OptionData):
             # print('is option data:', instrument)
+            start = perf_counter()
             chain_symbol = instrument.chain.chain_symbol
             algo = self.hedge_engine.hedge_algos.get(chain_symbol)
             if algo:
-                algo.calculate_balance_price()
+                # 成交只标记需要重算，由定时器合并计算，避免拆单成交时连续计算
+                if self.hedge_engine.balance_debounce:
+                    algo.mark_balance_dirty()
+                else:
+                    algo.calculate_balance_price()
+            self.hedge_engine.record_handler_cost("trade", start)
+
+    def close(self) -> None:
+        super().close()
+        self.hedge_engine.close()
 
 
 class StrategyTrading():
@@ -494,10 +579,26 @@ class StrategyTrading():
         return self.trade_volatility(chain_symbol, name, call_level, put_level, risk_rate, Direction.SHORT)
 
 
+class BalanceCalcResult:
+    """
+    Result of one balance price calculation. Solver only writes here, algo is updated in event thread.
+    """
+
+    def __init__(self, chain_symbol: str, version: int = 0):
+        self.chain_symbol: str = chain_symbol
+        self.version: int = version
+
+        self.balance_price: float = 0.0
+        self.evaluations: int = 0
+        self.solver_time: float = 0.0       # ms
+        self.delta_curve: Optional[tuple] = None    # set only if curve is rebuilt
+
+
 class HedgeEngine:
 
     setting_filename = "channel_hedge_algo_setting.json"
     data_filename = "channel_hedge_algo_data.json"
+    setting_key = "hedge_engine"        # engine parameters, saved beside chain settings
 
     def __init__(self, option_engine: OptionEngineExt):
         self.option_engine = option_engine
@@ -511,6 +612,9 @@ class HedgeEngine:
         self.calc_balance_trigger: int = 300
         self.offset_percent: float = 0.0
         self.hedge_percent: float = 0.0
+        self.balance_debounce: float = 1.0     # seconds, 0 to recalculate on every trade
+        self.is_async_calc: bool = True         # solve balance price in calculation worker
+        self.parameters = ['balance_debounce', 'is_async_calc']
 
         # variables
         self.inited = False
@@ -521,22 +625,41 @@ class HedgeEngine:
         self.data: Dict[str, Dict] = {}
         self.settings: Dict[str, Dict] = {}
 
+        # hedge calculation worker, results with old version are dropped
+        self.calc_queue: Queue = Queue()
+        self.calc_thread: Optional[Thread] = None
+        self.calc_active: bool = False
+        self.calc_versions: Dict[str, int] = {}
+        self.applied_versions: Dict[str, int] = {}
+        self.stale_result_count: int = 0
+
+        # event thread cost of handlers: name: [count, total ms, max ms]
+        self.handler_costs: Dict[str, List[float]] = {}
+
     def load_setting(self) -> None:
         settings = load_json(self.setting_filename)
+        engine_setting = settings.get(self.setting_key, {})
+        for name in self.parameters:
+            if name in engine_setting:
+                setattr(self, name, engine_setting[name])
+
         for algo in self.hedge_algos.values():
             algo_setting = settings.get(algo.chain_symbol)
             if algo_setting:
                 algo.offset_percent = algo_setting['offset_percent']
                 algo.hedge_percent = algo_setting['hedge_percent']
+                algo.balance_solver = algo_setting.get('balance_solver', algo.balance_solver)
                 self.put_hedge_algo_status_event(algo)
         self.settings = settings
         self.write_log(f"期权对冲引擎配置载入成功")
 
     def save_setting(self) -> None:
+        self.settings[self.setting_key] = {name: getattr(self, name) for name in self.parameters}
         for algo in self.hedge_algos.values():
             d = {}
             d['offset_percent'] = algo.offset_percent
             d['hedge_percent'] = algo.hedge_percent
+            d['balance_solver'] = algo.balance_solver
             self.settings[algo.chain_symbol] = d
         save_json(self.setting_filename, self.settings)
         self.write_log(f"期权对冲引擎配置载入成功")
@@ -583,6 +706,7 @@ class HedgeEngine:
             self.init_chains()
             self.init_hedge_algos()
             self.register_event()
+            self.start_calc_worker()
 
             self.load_setting()
             self.load_data()
@@ -607,11 +731,111 @@ class HedgeEngine:
         if algo:
             algo.stop_auto_hedge()
 
+    def close(self) -> None:
+        self.stop_calc_worker()
+
+    def start_calc_worker(self) -> None:
+        if self.calc_active:
+            return
+
+        self.calc_active = True
+        self.calc_thread = Thread(target=self.run_calc_worker, daemon=True)
+        self.calc_thread.start()
+
+    def stop_calc_worker(self) -> None:
+        if not self.calc_active:
+            return
+
+        self.calc_active = False
+        self.calc_thread.join()
+
+    def put_calc_request(self, algo: "ChannelHedgeAlgo", arrays: Dict[str, Any]) -> None:
+        """
+        Put snapshot of chain state to worker, newer request makes older one stale.
+        """
+        version = self.calc_versions.get(algo.chain_symbol, 0) + 1
+        self.calc_versions[algo.chain_symbol] = version
+        self.calc_queue.put((algo, version, arrays))
+
+    def is_calc_pending(self, chain_symbol: str) -> bool:
+        """
+        Whether latest requested calculation of chain has not been applied yet.
+        """
+        return self.calc_versions.get(chain_symbol, 0) != self.applied_versions.get(chain_symbol, 0)
+
+    def run_calc_worker(self) -> None:
+        while self.calc_active:
+            try:
+                request = self.calc_queue.get(timeout=1)
+            except Empty:
+                continue
+
+            # only latest request of each chain is calculated
+            requests = {request[0].chain_symbol: request}
+            while not self.calc_queue.empty():
+                request = self.calc_queue.get_nowait()
+                requests[request[0].chain_symbol] = request
+
+            for algo, version, arrays in requests.values():
+                if version != self.calc_versions.get(algo.chain_symbol):
+                    self.stale_result_count += 1
+                    continue
+
+                result = BalanceCalcResult(algo.chain_symbol, version)
+                try:
+                    algo.solve_balance_price(arrays, result)
+                except:
+                    msg = f"期权链{algo.chain_symbol}对冲计算异常：\n{traceback.format_exc()}"
+                    self.write_log(msg)
+                    # still post result, so the chain is not left pending forever
+                    result = BalanceCalcResult(algo.chain_symbol, version)
+
+                self.event_engine.put(Event(EVENT_OPTION_HEDGE_CALC_RESULT, result))
+
+    def process_calc_result(self, event: Event) -> None:
+        start = perf_counter()
+
+        result: BalanceCalcResult = event.data
+        chain_symbol = result.chain_symbol
+        if result.version != self.calc_versions.get(chain_symbol):
+            self.stale_result_count += 1
+            return
+
+        algo = self.hedge_algos[chain_symbol]
+        algo.apply_calc_result(result)
+        self.applied_versions[chain_symbol] = result.version
+
+        self.record_handler_cost("calc_result", start)
+
+    def record_handler_cost(self, name: str, start: float) -> None:
+        cost = (perf_counter() - start) * 1000
+        d = self.handler_costs.get(name, None)
+        if d is None:
+            d = [0, 0.0, 0.0]
+            self.handler_costs[name] = d
+        d[0] += 1
+        d[1] += cost
+        d[2] = max(d[2], cost)
+
+    def log_handler_costs(self) -> None:
+        if not self.handler_costs:
+            return
+
+        texts = [
+            f"{name}:{count}次/平均{total / count:.3f}ms/最大{max_cost:.3f}ms"
+            for name, (count, total, max_cost) in self.handler_costs.items()
+        ]
+        mode = "计算线程" if self.is_async_calc else "事件线程"
+        self.write_log(f"对冲引擎事件处理耗时（{mode}）：{'，'.join(texts)}，过期结果{self.stale_result_count}")
+        self.handler_costs.clear()
+
     def register_event(self) -> None:
         self.event_engine.register(EVENT_TIMER, self.process_timer_event)
         self.event_engine.register(EVENT_OPTION_STRATEGY_ORDER, self.process_strategy_order)
+        self.event_engine.register(EVENT_OPTION_HEDGE_CALC_RESULT, self.process_calc_result)
 
     def process_strategy_order(self, event: Event) -> None:
+        start = perf_counter()
         strategy_order = event.data
         algo = self.hedge_algos[strategy_order.chain_symbol]
 
@@ -625,7 +849,10 @@ class HedgeEngine:
 
             algo.calculate_balance_price()
 
+        self.record_handler_cost("strategy_order", start)
+
     def process_timer_event(self, event: Event) -> None:
+        start = perf_counter()
         try:
             if self.counters['check_delta'] > self.check_delta_trigger:
                 self.auto_hedge()
@@ -633,10 +860,14 @@ class HedgeEngine:
 
             if self.counters['calculate_balance'] > self.calc_balance_trigger:
                 self.calc_all_balance()
+                self.log_handler_costs()
                 self.counters['calculate_balance'] = 0
 
+            self.calc_dirty_balance()
+
             self.counters['check_delta'] += 1
             self.counters['calculate_balance'] += 1
+            self.record_handler_cost("timer", start)
         except:
             msg = f"处理委托事件，触发异常：\n{traceback.format_exc()}"
             self.write_log(msg)
@@ -646,6 +877,19 @@ class HedgeEngine:
             self.put_hedge_algo_status_event(algo)
             algo.check_hedge_signal()
 
+    def calc_dirty_balance(self) -> None:
+        """
+        Recalculate chains with new trades after debounce window. Chains being hedged wait for strategy order finished.
+        """
+        now = monotonic()
+        for algo in self.hedge_algos.values():
+            if not algo.is_balance_dirty or algo.is_hedging():
+                continue
+
+            if now - algo.balance_dirty_time < self.balance_debounce:
+                continue
+            algo.calculate_balance_price()
+
     def calc_all_balance(self) -> None:
         for algo in self.hedge_algos.values():
             if algo.is_hedging():
@@ -691,8 +935,42 @@ class ChannelHedgeAlgo:
         self.short_hedge_count: int = 0
         self.hedge_ref: int = 0
 
+        # trades mark balance dirty, recalculation is merged by hedge engine timer
+        self.is_balance_dirty: bool = False
+        self.balance_dirty_time: float = 0.0
+        self.skipped_calc_count: int = 0
+
+        # candidate prices evaluated in each round of vectorized balance search
+        self.search_grid_size: int = 21
+
+        # cached pos delta curve over underlying prices, rebuilt when position or impv changes
+        self.curve_range: float = 0.2
+        self.curve_size: int = 401
+        self.curve_impv_tolerance: float = 0.005
+        # (key, impvs, interest_rates, time_to_expiries, prices, deltas),
+        # replaced as a whole so UI thread always reads a complete curve
+        self.delta_curve: Optional[tuple] = None
+        self.curve_build_count: int = 0
+
+        # balance price solver: curve, grid or newton(falls back to brent)
+        self.balance_solver: str = "curve"
+        self.solver_max_iterations: int = 20
+        self.last_balance_root: float = 0.0
+        self.solver_evaluations: int = 0
+        self.solver_time: float = 0.0       # ms
+
         self.write_log = self.hedge_engine.write_log
-        self.parameters = ['offset_percent', 'hedge_percent']
+        self.parameters = ['offset_percent', 'hedge_percent', 'balance_solver']
+
+    def mark_balance_dirty(self) -> None:
+        """
+        Mark balance price need recalculation, last balance price is kept until then.
+        """
+        if self.is_balance_dirty:
+            self.skipped_calc_count += 1
+        else:
+            self.is_balance_dirty = True
+            self.balance_dirty_time = monotonic()
 
     def is_hedging(self) -> bool:
         return len(self.active_strategyids) > 0
@@ -739,13 +1017,284 @@ class ChannelHedgeAlgo:
                 chain_delta += delta
         return chain_delta
 
+    def pack_chain_arrays(self) -> Optional[Dict[str, Any]]:
+        """
+        Pack pricing inputs of options with position into arrays.
+        Return None if pricing model can not be vectorized or input is not ready.
+        """
+        options = [option for option in self.chain.options.values() if option.net_pos]
+        if not options:
+            return None
+
+        model = get_vector_pricing_model(options[0])
+        if not model:
+            return None
+
+        for option in options:
+            if not option.mid_impv or option.mid_impv < 0 or option.time_to_expiry <= 0:
+                return None
+
+        return {
+            "key": tuple((option.vt_symbol, option.net_pos) for option in options),
+            "model": model,
+            "mid_price": self.underlying.mid_price,
+            "pricetick": self.underlying.pricetick,
+            "strike": np.array([option.strike_price for option in options], dtype=float),
+            "interest_rate": np.array([option.interest_rate for option in options], dtype=float),
+            "time_to_expiry": np.array([option.time_to_expiry for option in options], dtype=float),
+            "impv": np.array([option.mid_impv for option in options], dtype=float),
+            "option_type": np.array([option.option_type for option in options], dtype=float),
+            "pos": np.array([option.size * option.net_pos for option in options], dtype=float),
+            # solver state at packing time, worker never reads algo attributes written by event thread
+            "balance_solver": self.balance_solver,
+            "delta_curve": self.delta_curve,
+            "last_root": self.last_balance_root,
+        }
+
     def calculate_balance_price(self) -> float:
         """
-        Search balcance price by bisection method.
+        Search balance price where chain pos delta is zero.
         """
+        self.is_balance_dirty = False
         if not self.chain.net_pos:
             return
 
+        arrays = self.pack_chain_arrays()
+
+        # 可向量化的计算放到对冲计算线程，事件线程只打包数据
+        if arrays and self.hedge_engine.is_async_calc:
+            self.hedge_engine.put_calc_request(self, arrays)
+            return
+
+        result = BalanceCalcResult(self.chain_symbol)
+        if arrays:
+            self.solve_balance_price(arrays, result)
+        else:
+            start = perf_counter()
+            result.balance_price = self.search_balance_price_by_bisection(result)
+            result.solver_time = (perf_counter() - start) * 1000
+
+        return self.apply_calc_result(result)
+
+    def solve_balance_price(self, arrays: Dict[str, Any], result: BalanceCalcResult) -> None:
+        """
+        Solve balance price from packed chain arrays into result.
+        Algo state is only read from arrays snapshot, so it can run in worker thread.
+        """
+        start = perf_counter()
+        balance_solver = arrays["balance_solver"]
+        if balance_solver == "curve":
+            result.balance_price = self.search_balance_price_by_curve(arrays, result)
+        elif balance_solver == "newton":
+            result.balance_price = self.search_balance_price_by_newton(arrays, result)
+        else:
+            result.balance_price = self.search_balance_price_by_grid(arrays, result)
+        result.solver_time = (perf_counter() - start) * 1000
+
+    def apply_calc_result(self, result: BalanceCalcResult) -> float:
+        """
+        Apply solver report, rebuilt curve and balance price in event thread.
+        """
+        self.solver_evaluations = result.evaluations
+        self.solver_time = result.solver_time
+        if result.delta_curve:
+            self.delta_curve = result.delta_curve
+            self.curve_build_count += 1
+        return self.update_balance_price(result.balance_price)
+
+    def update_balance_price(self, balance_price: float) -> float:
+        """
+        Apply new balance price and thresholds.
+        """
+        if not balance_price:
+            return
+        last_balance_price = self.balance_price
+        self.balance_price = balance_price
+        self.last_balance_root = balance_price
+
+        if self.offset_percent:
+            self.up_price = self.balance_price * (1 + self.offset_percent)
+            self.down_price = self.balance_price * (1 - self.offset_percent)
+
+        self.put_hedge_algo_status_event(self)
+
+        # 基准价变动不足一跳时不输出日志，避免定时重算刷屏
+        if abs(balance_price - last_balance_price) >= self.underlying.pricetick:
+            self.write_log(
+                f"期权链{self.chain_symbol}中性基准价{self.balance_price:.4f}，"
+                f"计算次数{self.solver_evaluations}，耗时{self.solver_time:.2f}毫秒"
+            )
+        return self.balance_price
+
+    def get_delta_curve(self, arrays: Dict[str, Any], result: BalanceCalcResult) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get cached pos delta curve, rebuild it if position, interest rate or time to expiry changed,
+        impv moved beyond tolerance or underlying price moved near the edge of curve.
+        """
+        mid_price = arrays["mid_price"]
+        if arrays["delta_curve"]:
+            key, impvs, interest_rates, time_to_expiries, prices, deltas = arrays["delta_curve"]
+            if (
+                key == arrays["key"]
+                and np.array_equal(arrays["interest_rate"], interest_rates)
+                and np.array_equal(arrays["time_to_expiry"], time_to_expiries)
+                and np.abs(arrays["impv"] - impvs).max() <= self.curve_impv_tolerance
+                and prices[0] * 1.05 < mid_price < prices[-1] * 0.95
+            ):
+                return prices, deltas
+
+        prices = np.linspace(
+            mid_price * (1 - self.curve_range),
+            mid_price * (1 + self.curve_range),
+            self.curve_size
+        )
+        deltas = calculate_chain_deltas(prices, arrays)
+        result.delta_curve = (
+            arrays["key"], arrays["impv"], arrays["interest_rate"], arrays["time_to_expiry"], prices, deltas
+        )
+        result.evaluations += 1
+        return prices, deltas
+
+    def get_delta_at(self, price: float) -> Optional[float]:
+        """
+        Pos delta if underlying moves to price, interpolated from cached curve.
+        Read only, so it is safe to call from UI thread. Curve is only built by balance calculation.
+        Return None if curve is not built, stale or price is out of curve range.
+        """
+        delta_curve = self.delta_curve
+        if not delta_curve:
+            return None
+        key, impvs, interest_rates, time_to_expiries, prices, deltas = delta_curve
+
+        options = [option for option in self.chain.options.values() if option.net_pos]
+        if key != tuple((option.vt_symbol, option.net_pos) for option in options):
+            return None
+
+        for option, impv, interest_rate, time_to_expiry in zip(options, impvs, interest_rates, time_to_expiries):
+            if option.interest_rate != interest_rate or option.time_to_expiry != time_to_expiry:
+                return None
+            if not option.mid_impv or abs(option.mid_impv - impv) > self.curve_impv_tolerance:
+                return None
+
+        if not prices[0] <= price <= prices[-1]:
+            return None
+        return float(np.interp(price, prices, deltas))
+
+    def search_balance_price_by_curve(self, arrays: Dict[str, Any], result: BalanceCalcResult) -> float:
+        """
+        Find zero delta on cached curve by linear interpolation, use newton solver if not in curve range.
+        """
+        prices, deltas = self.get_delta_curve(arrays, result)
+
+        crossings = np.nonzero(np.sign(deltas[:-1]) != np.sign(deltas[1:]))[0]
+        if not len(crossings):
+            return self.search_balance_price_by_newton(arrays, result)
+
+        mid_price = arrays["mid_price"]
+        n = crossings[np.argmin(np.abs(prices[crossings] - mid_price))]
+        if not deltas[n]:
+            return float(prices[n])
+
+        d0, d1 = deltas[n], deltas[n + 1]
+        return float(prices[n] + (prices[n + 1] - prices[n]) * d0 / (d0 - d1))
+
+    def search_balance_price_by_newton(self, arrays: Dict[str, Any], result: BalanceCalcResult) -> float:
+        """
+        Newton steps with chain gamma as derivative, start from last balance price.
+        Fall back to brent once the root is bracketed and newton step is unsafe.
+        """
+        pricetick = arrays["pricetick"]
+        mid_price = arrays["mid_price"]
+
+        # last root is only a good start when underlying has not moved far away
+        try_price = arrays["last_root"]
+        if not try_price or abs(try_price / mid_price - 1) > 0.1:
+            try_price = mid_price
+
+        left_end = 0        # price with positive delta
+        right_end = 0       # price with negative delta
+
+        for _ in range(self.solver_max_iterations):
+            try_delta, slope = calculate_chain_delta_slope(try_price, arrays)
+            result.evaluations += 1
+
+            if not try_delta:
+                return try_price
+            elif try_delta > 0:
+                left_end = try_price
+            else:
+                right_end = try_price
+            is_bracketed = left_end and right_end
+
+            next_price = try_price - try_delta / slope if slope else 0
+            if is_bracketed:
+                low, high = min(left_end, right_end), max(left_end, right_end)
+                if not low < next_price < high:
+                    return self.search_balance_price_by_brent(arrays, low, high, result)
+            elif next_price <= 0 or abs(next_price / try_price - 1) > 0.05:
+                # same as bisection: move 5% towards zero delta when newton step is not reliable
+                next_price = try_price * 1.05 if try_delta > 0 else try_price * 0.95
+
+            if abs(next_price - try_price) < pricetick:
+                return next_price
+            try_price = next_price
+
+        if left_end and right_end:
+            low, high = min(left_end, right_end), max(left_end, right_end)
+            return self.search_balance_price_by_brent(arrays, low, high, result)
+        return 0
+
+    def search_balance_price_by_brent(
+        self,
+        arrays: Dict[str, Any],
+        low: float,
+        high: float,
+        result: BalanceCalcResult
+    ) -> float:
+        """"""
+        def func(price: float) -> float:
+            result.evaluations += 1
+            return calculate_chain_delta_slope(price, arrays)[0]
+
+        return brentq(func, low, high, xtol=arrays["pricetick"])
+
+    def search_balance_price_by_grid(self, arrays: Dict[str, Any], result: BalanceCalcResult) -> float:
+        """
+        Evaluate a grid of prices at once, then refine the grid in the bracket where delta changes sign.
+        """
+        pricetick = arrays["pricetick"]
+        mid_price = arrays["mid_price"]
+
+        # bracket grows by 5% each round until delta changes sign
+        for i in range(1, 20):
+            prices = np.linspace(mid_price * (1 - 0.05 * i), mid_price * (1 + 0.05 * i), self.search_grid_size)
+            deltas = calculate_chain_deltas(prices, arrays)
+            result.evaluations += 1
+            crossings = np.nonzero(np.sign(deltas[:-1]) != np.sign(deltas[1:]))[0]
+            if len(crossings):
+                break
+        else:
+            return 0
+
+        while True:
+            # take the crossing nearest to mid price
+            n = crossings[np.argmin(np.abs(prices[crossings] - mid_price))]
+            if not deltas[n]:
+                return prices[n]
+            left_end, right_end = prices[n], prices[n + 1]
+
+            if right_end - left_end < pricetick * 2:
+                return (left_end + right_end) / 2
+
+            prices = np.linspace(left_end, right_end, self.search_grid_size)
+            deltas = calculate_chain_deltas(prices, arrays)
+            result.evaluations += 1
+            crossings = np.nonzero(np.sign(deltas[:-1]) != np.sign(deltas[1:]))[0]
+
+    def search_balance_price_by_bisection(self, result: BalanceCalcResult) -> float:
+        """
+        Search balcance price by bisection method.
+        """
         left_end = 0
         right_end = 0
         pricetick = self.underlying.pricetick
@@ -753,6 +1302,7 @@ class ChannelHedgeAlgo:
 
         while True:
             try_delta = self.calculate_pos_delta(try_price)
+            result.evaluations += 1
             if not try_delta:
                 return
 
@@ -773,18 +1323,10 @@ class ChannelHedgeAlgo:
                 else:
                     try_price = (left_end + right_end) / 2
             else:
-                self.balance_price = try_price
-                break
+                return try_price
 
             if right_end - left_end < pricetick * 2:
-                self.balance_price = (left_end + right_end) / 2
-                break
-
-        if self.offset_percent:
-            self.up_price = self.balance_price * (1 + self.offset_percent)
-            self.down_price = self.balance_price * (1 - self.offset_percent)
-
-        self.put_hedge_algo_status_event(self)
+                return (left_end + right_end) / 2
 
     def start_auto_hedge(self, params: Dict) -> None:
         if self.is_active():
@@ -852,6 +1394,10 @@ class ChannelHedgeAlgo:
             print('algo is hedgeing')
             return False
 
+        # thresholds are out of date until new position is recalculated and applied
+        if self.is_balance_dirty or self.hedge_engine.is_calc_pending(self.chain_symbol):
+            return False
+
         if not self.balance_price or not self.up_price or not self.down_price:
             print('up and down is not ready')
             return False
@@ -120,6 +120,8 @@ class HedgeMonitor(QtWidgets.QTableWidget):
         {"name": "up_price", "display": "上阈值", "cell": MonitorCell},
         {"name": "down_price", "display": "下阈值", "cell": MonitorCell},
         {"name": "pos_delta", "display": "Delta", "cell": GreeksCell},
+        {"name": "up_delta", "display": "上阈值Delta", "cell": GreeksCell},
+        {"name": "down_delta", "display": "下阈值Delta", "cell": GreeksCell},
         {"name": "net_pos", "display": "组合净仓", "cell": PosCell},
         {"name": "offset_percent", "display": "偏移比例", "cell": OffsetPercentSpinBox},
         {"name": "hedge_percent", "display": "对冲比例", "cell": HedgePercentSpinBox},
@@ -201,6 +203,11 @@ class HedgeMonitor(QtWidgets.QTableWidget):
         print('update algo status:', algo.chain.net_pos, algo.chain.pos_delta)
         cells['net_pos'].setText(str(algo.chain.net_pos))
         cells['pos_delta'].setText(f'{algo.chain.pos_delta:0.0f}')
+
+        # 标的价格到达阈值时的组合Delta，从缓存曲线插值得到
+        for name, price in [('up_delta', algo.up_price), ('down_delta', algo.down_price)]:
+            delta = algo.get_delta_at(price) if price and algo.chain.net_pos else None
+            cells[name].setText(f'{delta:0.0f}' if delta is not None else '')
         cells['auto_hedge'].update_status(algo.is_active())
 
         cells['offset_percent'].setValue(algo.offset_percent * 100)
@@ -0,0 +1,316 @@
+"""
+Frozen volume of PositionHolding, kept as running sums, against full recomputation over active orders.
+"""
+import random
+from copy import copy
+from time import perf_counter
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("vnpy.trader.constant")
+
+from vnpy.trader.constant import Direction, Offset, Status, Exchange, OrderType  # noqa: E402
+from vnpy.trader.object import OrderData, OrderRequest, PositionData  # noqa: E402
+
+from follow_trading.converter import OffsetConverter, PositionHolding  # noqa: E402
+
+
+def full_recompute(holding: PositionHolding) -> tuple:
+    """Frozen volume calculated by looping every active order, as before running sums."""
+    long_td_frozen = long_yd_frozen = short_td_frozen = short_yd_frozen = 0
+
+    for order in holding.active_orders.values():
+        if order.offset == Offset.OPEN:
+            continue
+
+        frozen = order.volume - order.traded
+
+        if order.direction == Direction.LONG:
+            if order.offset == Offset.CLOSETODAY:
+                short_td_frozen += frozen
+            elif order.offset == Offset.CLOSEYESTERDAY:
+                short_yd_frozen += frozen
+            elif order.offset == Offset.CLOSE:
+                short_td_frozen += frozen
+                if short_td_frozen > holding.short_td:
+                    short_yd_frozen += short_td_frozen - holding.short_td
+                    short_td_frozen = holding.short_td
+        elif order.direction == Direction.SHORT:
+            if order.offset == Offset.CLOSETODAY:
+                long_td_frozen += frozen
+            elif order.offset == Offset.CLOSEYESTERDAY:
+                long_yd_frozen += frozen
+            elif order.offset == Offset.CLOSE:
+                long_td_frozen += frozen
+                if long_td_frozen > holding.long_td:
+                    long_yd_frozen += long_td_frozen - holding.long_td
+                    long_td_frozen = holding.long_td
+
+    return long_td_frozen, long_yd_frozen, short_td_frozen, short_yd_frozen
+
+
+def sum_recompute(holding: PositionHolding) -> tuple:
+    """Frozen volume by the documented rule, from remaining volume of active orders summed by offset."""
+    sums = {}
+    for order in holding.active_orders.values():
+        key = (order.direction, order.offset)
+        sums[key] = sums.get(key, 0) + order.volume - order.traded
+
+    def split(td: int, direction: Direction) -> tuple:
+        td_frozen = sums.get((direction, Offset.CLOSETODAY), 0)
+        yd_frozen = sums.get((direction, Offset.CLOSEYESTERDAY), 0)
+        close_frozen = sums.get((direction, Offset.CLOSE), 0)
+        close_td_frozen = min(close_frozen, max(td - td_frozen, 0))
+        return td_frozen + close_td_frozen, yd_frozen + close_frozen - close_td_frozen
+
+    long_td_frozen, long_yd_frozen = split(holding.long_td, Direction.SHORT)
+    short_td_frozen, short_yd_frozen = split(holding.short_td, Direction.LONG)
+    return long_td_frozen, long_yd_frozen, short_td_frozen, short_yd_frozen
+
+
+def create_order(orderid: str, direction: Direction, offset: Offset, volume: int) -> OrderData:
+    """"""
+    return OrderData(
+        gateway_name="CTP",
+        symbol="rb2410",
+        exchange=Exchange.SHFE,
+        orderid=orderid,
+        direction=direction,
+        offset=offset,
+        volume=volume,
+        status=Status.NOTTRADED
+    )
+
+
+def get_frozen(holding: PositionHolding) -> tuple:
+    """"""
+    return (
+        holding.long_td_frozen,
+        holding.long_yd_frozen,
+        holding.short_td_frozen,
+        holding.short_yd_frozen
+    )
+
+
+def create_holding() -> PositionHolding:
+    """"""
+    contract = SimpleNamespace(vt_symbol="rb2410.SHFE", exchange=Exchange.SHFE)
+    holding = PositionHolding(contract)
+    holding.long_td = random.randint(0, 10)
+    holding.short_td = random.randint(0, 10)
+    return holding
+
+
+def test_frozen_equals_full_recompute():
+    """"""
+    random.seed(0)
+
+    for _ in range(500):
+        holding = create_holding()
+
+        # Converter never mixes CLOSE with CLOSETODAY on one side, where full recompute depends on dict order
+        offsets = {
+            direction: random.choice([
+                [Offset.CLOSE, Offset.OPEN, Offset.NONE],
+                [Offset.CLOSETODAY, Offset.CLOSEYESTERDAY, Offset.OPEN, Offset.NONE]
+            ])
+            for direction in [Direction.LONG, Direction.SHORT]
+        }
+
+        orders = {}
+        for n in range(40):
+            if orders and random.random() < 0.5:
+                last = random.choice(list(orders.values()))
+                if not last.is_active():
+                    continue
+                traded = min(last.volume, last.traded + random.randint(0, 2))
+                if traded == last.volume:
+                    status = Status.ALLTRADED
+                else:
+                    status = random.choice([Status.PARTTRADED, Status.CANCELLED, Status.REJECTED])
+                order = OrderData(
+                    gateway_name=last.gateway_name,
+                    symbol=last.symbol,
+                    exchange=last.exchange,
+                    orderid=last.orderid,
+                    direction=last.direction,
+                    offset=last.offset,
+                    volume=last.volume,
+                    traded=traded,
+                    status=status
+                )
+            else:
+                direction = random.choice([Direction.LONG, Direction.SHORT])
+                order = OrderData(
+                    gateway_name="CTP",
+                    symbol="rb2410",
+                    exchange=Exchange.SHFE,
+                    orderid=str(n),
+                    direction=direction,
+                    offset=random.choice(offsets[direction]),
+                    volume=random.randint(1, 5),
+                    status=Status.NOTTRADED
+                )
+
+            orders[order.vt_orderid] = order
+            holding.update_order(order)
+
+            assert (
+                holding.long_td_frozen,
+                holding.long_yd_frozen,
+                holding.short_td_frozen,
+                holding.short_yd_frozen
+            ) == full_recompute(holding)
+            assert holding.long_pos_frozen == holding.long_td_frozen + holding.long_yd_frozen
+            assert holding.short_pos_frozen == holding.short_td_frozen + holding.short_yd_frozen
+
+
+def test_order_request_with_default_offset():
+    """Net-mode request with Offset.NONE does not freeze position."""
+    holding = create_holding()
+    req = OrderRequest(
+        symbol="rb2410",
+        exchange=Exchange.SHFE,
+        direction=Direction.LONG,
+        type=OrderType.LIMIT,
+        volume=1,
+        price=3000
+    )
+    holding.update_order_request(req, "CTP.1")
+
+    assert holding.short_pos_frozen == 0
+    assert holding.long_pos_frozen == 0
+
+
+def create_converter(handlers: list = None) -> OffsetConverter:
+    """"""
+    handlers = [] if handlers is None else handlers
+    contracts = {
+        vt_symbol: SimpleNamespace(vt_symbol=vt_symbol, exchange=Exchange.SHFE, net_position=False)
+        for vt_symbol in ["rb2410.SHFE", "hc2410.SHFE"]
+    }
+    main_engine = SimpleNamespace(
+        event_engine=SimpleNamespace(
+            register=lambda type_, handler: handlers.append(handler),
+            unregister=lambda type_, handler: handlers.remove(handler)
+        ),
+        get_contract=contracts.get
+    )
+    return OffsetConverter(main_engine)
+
+
+def test_update_positions_equals_single_updates():
+    """"""
+    positions = [
+        PositionData(
+            gateway_name="CTP",
+            symbol=symbol,
+            exchange=Exchange.SHFE,
+            direction=direction,
+            volume=volume,
+            yd_volume=volume // 2
+        )
+        for symbol in ["rb2410", "hc2410", "ag2412"]
+        for direction, volume in [(Direction.LONG, 5), (Direction.SHORT, 3)]
+    ]
+
+    bulk = create_converter()
+    bulk.update_positions(positions)
+
+    single = create_converter()
+    for position in positions:
+        single.update_position(position)
+
+    assert bulk.holdings.keys() == single.holdings.keys() == {"rb2410.SHFE", "hc2410.SHFE"}
+    for vt_symbol, holding in bulk.holdings.items():
+        assert vars(holding) == vars(single.holdings[vt_symbol])
+
+
+def test_close_unregisters_contract_handler():
+    """"""
+    handlers = []
+    converter = create_converter(handlers)
+    assert handlers == [converter.process_contract_event]
+
+    converter.close()
+    assert handlers == []
+
+
+def test_mixed_close_offsets_follow_documented_rule():
+    """CLOSE and CLOSETODAY on one side: CLOSE freezes today position left by CLOSETODAY, then yesterday."""
+    random.seed(1)
+
+    for _ in range(500):
+        holding = create_holding()
+        for n in range(20):
+            order = create_order(
+                str(n),
+                random.choice([Direction.LONG, Direction.SHORT]),
+                random.choice([Offset.CLOSE, Offset.CLOSETODAY, Offset.CLOSEYESTERDAY, Offset.OPEN]),
+                random.randint(1, 5)
+            )
+            holding.update_order(order)
+
+            if random.random() < 0.3:
+                order.traded = random.randint(0, order.volume)
+                order.status = random.choice([Status.PARTTRADED, Status.CANCELLED])
+                holding.update_order(order)
+
+            assert get_frozen(holding) == sum_recompute(holding)
+
+
+def test_mixed_close_offsets_independent_of_arrival():
+    """The former loop gave (td 7, yd 0) when CLOSE arrived first and (td 5, yd 2) otherwise."""
+    results = []
+    for offsets in [[Offset.CLOSE, Offset.CLOSETODAY], [Offset.CLOSETODAY, Offset.CLOSE]]:
+        holding = create_holding()
+        holding.long_td = 5
+        for n, offset in enumerate(offsets):
+            volume = 4 if offset == Offset.CLOSE else 3
+            holding.update_order(create_order(str(n), Direction.SHORT, offset, volume))
+        results.append((holding.long_td_frozen, holding.long_yd_frozen))
+
+    assert results == [(5, 2), (5, 2)]
+
+
+def test_benchmark_500_active_orders(capsys):
+    """Order update cost with 500 active close orders, running sums against the former full loop."""
+    random.seed(2)
+    holding = create_holding()
+    holding.long_td = holding.short_td = 1000
+
+    orders = []
+    for n in range(500):
+        direction = random.choice([Direction.LONG, Direction.SHORT])
+        order = create_order(str(n), direction, random.choice([Offset.CLOSE, Offset.CLOSEYESTERDAY]), 10)
+        holding.update_order(order)
+        orders.append(order)
+
+    updates = []
+    for _ in range(2000):
+        order = copy(random.choice(orders))
+        order.traded = random.randint(0, order.volume - 1)
+        order.status = Status.PARTTRADED
+        updates.append(order)
+
+    start = perf_counter()
+    for order in updates:
+        holding.update_order(order)
+    incremental = (perf_counter() - start) / len(updates)
+
+    start = perf_counter()
+    for order in updates:
+        holding.active_orders[order.vt_orderid] = order
+        full_recompute(holding)
+    full = (perf_counter() - start) / len(updates)
+
+    with capsys.disabled():
+        print(
+            f"\n500 active orders, per update: running sums {incremental * 1e6:.2f}us, "
+            f"full loop {full * 1e6:.2f}us"
+        )
+
+    assert len(holding.active_orders) == 500
+    assert get_frozen(holding) == full_recompute(holding)
+    assert incremental < full
@@ -0,0 +1,310 @@
+"""
+Benchmarks of FollowEngine hot paths, run on the replay harness with stub main engine and event engine.
+
+Each benchmark prints its figures and only asserts loose bounds, so it stays stable on slow machines.
+"""
+from datetime import datetime, timedelta
+from statistics import median
+from time import perf_counter
+
+import pytest
+
+pytest.importorskip("vnpy.trader.constant")
+
+from vnpy.event import Event  # noqa: E402
+from vnpy.trader.constant import Direction, Exchange, Offset, Product, Status  # noqa: E402
+from vnpy.trader.event import EVENT_ORDER, EVENT_TICK  # noqa: E402
+from vnpy.trader.object import ContractData, OrderData, TickData, TradeData  # noqa: E402
+
+from follow_trading.replay import (  # noqa: E402
+    FollowReplay,
+    ReplayEventEngine,
+    ReplayFollowEngine,
+    ReplayMainEngine
+)
+
+
+CONTRACT = ContractData(
+    symbol="rb2410",
+    exchange=Exchange.SHFE,
+    name="螺纹钢2410",
+    product=Product.FUTURES,
+    size=10,
+    pricetick=1,
+    gateway_name="SOURCE"
+)
+
+
+def create_engine(setting: dict = None) -> ReplayFollowEngine:
+    """"""
+    setting = dict(setting or {})
+    setting.setdefault("source_gateway_name", "SOURCE")
+    setting.setdefault("target_gateway_name", "TARGET")
+    setting.setdefault("latency_log_interval", 0)
+
+    event_engine = ReplayEventEngine()
+    main_engine = ReplayMainEngine(event_engine, setting["target_gateway_name"])
+    main_engine.add_contract(CONTRACT)
+    main_engine.now = datetime.now()
+
+    engine = ReplayFollowEngine(main_engine, event_engine, setting)
+    engine.init_engine()
+    return engine
+
+
+def time_calls(func, args_list: list, repeat: int = 5) -> float:
+    """Median seconds per call over several rounds."""
+    results = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for args in args_list:
+            func(*args)
+        results.append((perf_counter() - start) / len(args_list))
+    return median(results)
+
+
+def print_result(capsys, title: str, rows: list):
+    """"""
+    with capsys.disabled():
+        print(f"\n{title}")
+        for row in rows:
+            print("  " + row)
+
+
+def create_order(orderid: str, status: Status = Status.ALLTRADED, gateway_name: str = "TARGET") -> OrderData:
+    """"""
+    return OrderData(
+        gateway_name=gateway_name,
+        symbol=CONTRACT.symbol,
+        exchange=CONTRACT.exchange,
+        orderid=orderid,
+        direction=Direction.LONG,
+        offset=Offset.OPEN,
+        volume=1,
+        traded=1,
+        status=status
+    )
+
+
+def test_benchmark_target_order_callback_vs_followed_count(capsys):
+    """Target order callback latency stays flat while followed orders grow to 100k."""
+    rows = []
+    latencies = {}
+
+    for count in [1000, 10000, 100000]:
+        engine = create_engine()
+        engine.tradeid_orderids_dict.update(
+            (f"SOURCE.{n}", [f"TARGET.{n}"]) for n in range(count)
+        )
+        engine.rebuild_signal_index()
+
+        hit_events = [
+            (Event(EVENT_ORDER, create_order(str(n))),) for n in range(count - 200, count)
+        ]
+        miss_events = [
+            (Event(EVENT_ORDER, create_order(f"other{n}")),) for n in range(200)
+        ]
+
+        hit = time_calls(engine.process_order_event, hit_events)
+        miss = time_calls(engine.process_order_event, miss_events)
+        latencies[count] = max(hit, miss)
+        rows.append(f"{count:>6} followed orders: hit {hit * 1e6:.2f}us, miss {miss * 1e6:.2f}us")
+        engine.close()
+
+    print_result(capsys, "target order callback latency", rows)
+
+    # 线性扫描时10万单比1千单慢约100倍，反向索引下应基本持平
+    assert latencies[100000] < latencies[1000] * 5
+
+
+def create_tick(dt: datetime, price: float = 1000) -> TickData:
+    """"""
+    return TickData(
+        symbol=CONTRACT.symbol,
+        exchange=CONTRACT.exchange,
+        datetime=dt,
+        last_price=price,
+        limit_up=price * 1.1,
+        limit_down=price * 0.9,
+        bid_price_1=price - CONTRACT.pricetick,
+        ask_price_1=price,
+        bid_volume_1=100,
+        ask_volume_1=100,
+        gateway_name="SOURCE"
+    )
+
+
+def generate_tick_storm(signal_count: int, storm_size: int) -> list:
+    """
+    Each source trade is followed by storm_size ticks one millisecond apart.
+    """
+    dt = datetime.now().replace(hour=9, minute=30, second=0, microsecond=0)
+    events = [(dt, create_tick(dt))]
+
+    for n in range(signal_count):
+        dt += timedelta(milliseconds=1)
+        direction, offset = (Direction.LONG, Offset.OPEN) if n % 2 == 0 else (Direction.SHORT, Offset.CLOSE)
+        order = OrderData(
+            symbol=CONTRACT.symbol,
+            exchange=CONTRACT.exchange,
+            orderid=str(n),
+            direction=direction,
+            offset=offset,
+            price=1000,
+            volume=1,
+            traded=1,
+            status=Status.ALLTRADED,
+            datetime=dt,
+            gateway_name="SOURCE"
+        )
+        trade = TradeData(
+            symbol=CONTRACT.symbol,
+            exchange=CONTRACT.exchange,
+            orderid=str(n),
+            tradeid=str(n),
+            direction=direction,
+            offset=offset,
+            price=1000,
+            volume=1,
+            datetime=dt,
+            gateway_name="SOURCE"
+        )
+        events.append((dt, order))
+        events.append((dt, trade))
+
+        for _ in range(storm_size):
+            dt += timedelta(milliseconds=1)
+            events.append((dt, create_tick(dt)))
+
+    return events
+
+
+def test_benchmark_direct_vs_queued_dispatch_in_tick_storm(capsys):
+    """Direct dispatch sends inside trade callback, queued dispatch waits behind the tick storm."""
+    signal_count = 50
+    storm_size = 500
+    events = generate_tick_storm(signal_count, storm_size)
+
+    rows = []
+    results = {}
+    for is_direct_dispatch in [False, True]:
+        setting = {"is_direct_dispatch": is_direct_dispatch, "latency_log_interval": 0}
+        replay = FollowReplay(setting, [CONTRACT])
+        result = replay.run(events, batch_size=storm_size)
+
+        path = "inline" if is_direct_dispatch else "direct"
+        wait = result.latency_summary[(path, "enqueue_to_dispatch")]
+        total = result.latency_summary[(path, "receive_to_sent")]
+        results[is_direct_dispatch] = (result, wait)
+
+        name = "direct dispatch" if is_direct_dispatch else "queued dispatch"
+        rows.append(
+            f"{name}: queue depth {result.follow_order_queue_depth}, "
+            f"enqueue->dispatch p50 {wait['p50']:.3f}ms p99 {wait['p99']:.3f}ms, "
+            f"receive->sent p50 {total['p50']:.3f}ms, target orders {result.target_order_count}"
+        )
+
+    print_result(capsys, f"dispatch in tick storm ({storm_size} ticks per signal)", rows)
+
+    queued, queued_wait = results[False]
+    direct, direct_wait = results[True]
+    assert queued.target_order_count == direct.target_order_count == signal_count
+    assert queued.follow_order_queue_depth >= storm_size
+    assert direct.follow_order_queue_depth == 0
+    assert direct_wait["p50"] < queued_wait["p50"]
+
+
+def create_source_trade(tradeid: str, dt: datetime, volume: int = 1) -> TradeData:
+    """"""
+    return TradeData(
+        symbol=CONTRACT.symbol,
+        exchange=CONTRACT.exchange,
+        orderid=tradeid,
+        tradeid=tradeid,
+        direction=Direction.LONG,
+        offset=Offset.OPEN,
+        price=1000,
+        volume=volume,
+        datetime=dt,
+        gateway_name="SOURCE"
+    )
+
+
+def test_benchmark_order_req_pipeline(capsys):
+    """Trade to order request, pricing and splitting, pricing reads the per-symbol record only."""
+    engine = create_engine({"single_max": 3, "tick_add": 1})
+    engine.process_tick_event(Event(EVENT_TICK, create_tick(engine.main_engine.now)))
+
+    contract_calls = []
+    get_contract = engine.main_engine.get_contract
+    engine.main_engine.get_contract = lambda vt_symbol: contract_calls.append(vt_symbol) or get_contract(vt_symbol)
+
+    trades = [
+        (create_source_trade(str(n), engine.main_engine.now, volume=7),) for n in range(1000)
+    ]
+    reqs = [(engine.convert_trade_to_order_req(trade),) for trade, in trades]
+    prices = [(req.vt_symbol, req.direction, req.price) for req, in reqs]
+
+    def run_pipeline(trade):
+        req = engine.convert_trade_to_order_req(trade)
+        req.price = engine.convert_order_price(req.vt_symbol, req.direction, req.price)
+        return engine.split_req(req)
+
+    convert = time_calls(engine.convert_trade_to_order_req, trades)
+    price = time_calls(engine.convert_order_price, prices)
+    split = time_calls(engine.split_req, reqs)
+    pipeline = time_calls(run_pipeline, trades)
+
+    print_result(capsys, "order request pipeline, per trade", [
+        f"convert_trade_to_order_req {convert * 1e6:.2f}us",
+        f"convert_order_price {price * 1e6:.2f}us",
+        f"split_req {split * 1e6:.2f}us",
+        f"whole pipeline {pipeline * 1e6:.2f}us",
+    ])
+
+    req_list = run_pipeline(trades[0][0])
+    assert [req.volume for req in req_list] == [3, 3, 1]
+    assert req_list[0].price == 1001
+    assert not contract_calls
+    engine.close()
+
+
+def test_benchmark_filtered_source_trade(capsys):
+    """Cost per source trade going through filter_source_trade, by filter outcome."""
+    engine = create_engine()
+    now = engine.main_engine.now
+
+    fresh = [(create_source_trade(f"fresh{n}", now),) for n in range(1000)]
+    timeout = [(create_source_trade(f"timeout{n}", now - timedelta(minutes=5)),) for n in range(1000)]
+    followed = [(create_source_trade(f"followed{n}", now),) for n in range(1000)]
+    for trade, in followed:
+        engine.tradeid_orderids_dict[trade.vt_tradeid] = []
+
+    # 手数过滤需要查询源户委托
+    for trade, in fresh + timeout + followed:
+        engine.main_engine.orders[trade.vt_orderid] = create_order(trade.orderid, gateway_name="SOURCE")
+
+    def strptime_timeout(trade):
+        # 旧实现：格式化成时间字符串再解析回来比较
+        trade_time = datetime.strptime(trade.datetime.strftime("%H:%M:%S"), "%H:%M:%S")
+        trade_time = now.replace(hour=trade_time.hour, minute=trade_time.minute, second=trade_time.second)
+        return (now - trade_time).total_seconds() > engine.filter_trade_timeout
+
+    timeout_check = time_calls(engine.is_timeout_trade, fresh)
+    strptime_check = time_calls(strptime_timeout, fresh)
+    passed = time_calls(engine.filter_source_trade, fresh)
+    timed_out = time_calls(engine.filter_source_trade, timeout)
+    duplicated = time_calls(engine.filter_source_trade, followed)
+
+    print_result(capsys, "source trade filter, per event", [
+        f"is_timeout_trade {timeout_check * 1e6:.2f}us (strptime round trip {strptime_check * 1e6:.2f}us)",
+        f"filter_source_trade passed {passed * 1e6:.2f}us",
+        f"filter_source_trade timed out {timed_out * 1e6:.2f}us",
+        f"filter_source_trade already followed {duplicated * 1e6:.2f}us",
+    ])
+
+    assert engine.filter_source_trade(fresh[0][0])
+    assert not engine.filter_source_trade(timeout[0][0])
+    assert not engine.filter_source_trade(followed[0][0])
+    assert timeout_check < strptime_check
+    engine.close()